@@ -2,6 +2,7 @@ import os
 
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, text
 from sqlalchemy.orm import DeclarativeBase
 
 
@@ -15,16 +16,51 @@ app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", os.urandom(24).hex())
 
 # configure the database
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
+database_url = os.environ.get("DATABASE_URL")
+app.config["SQLALCHEMY_DATABASE_URI"] = database_url
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_recycle": 300,
     "pool_pre_ping": True,
 }
+if database_url and not database_url.startswith("sqlite"):
+    # request threads plus the crawl and batch workers share this pool;
+    # Flask-SQLAlchemy already gives in-memory SQLite a StaticPool
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"].update({
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 5)),
+        "pool_timeout": 30,
+        # reuse the most recent connection so surplus ones go idle and get recycled
+        "pool_use_lifo": True,
+    })
 # initialize the app with the extension
 db.init_app(app)
 
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Let readers carry on while the crawl workers write, with fewer fsyncs per commit"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-64000")  # 64 MB
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA foreign_keys=ON")  # SQLite only enforces ON DELETE CASCADE when asked
+    cursor.close()
+
+
 with app.app_context():
+    if db.engine.dialect.name == "sqlite":
+        event.listen(db.engine, "connect", set_sqlite_pragmas)
+
     # Make sure to import the models here or their tables won't be created
     import models  # noqa: F401
 
-    db.create_all()
\ No newline at end of file
+    db.create_all()
+
+    if db.engine.dialect.name == "sqlite":
+        # crawl_jobs.error_message used to hold plain text; wrap any such rows
+        # as JSON strings so the JSON column can load them
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                "UPDATE crawl_jobs SET error_message = json_quote(error_message) "
+                "WHERE error_message IS NOT NULL AND NOT json_valid(error_message)"
+            ))
\ No newline at end of file
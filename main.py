@@ -3,13 +3,26 @@
 Easy Crawl4AI Web Interface - A user-friendly web interface for the crawl4ai web crawler
 """
 
+import io
 import os
+import re
+import csv
 import sys
 import json
+import time
+import asyncio
+import functools
 import logging
+import threading
+import subprocess
+import contextlib
+import importlib
+import importlib.util
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlsplit, urlunsplit
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -17,9 +30,17 @@ logger = logging.getLogger(__name__)
 
 # Import error handler
 try:
-    from error_handler import format_error_message, format_error_html
+    from error_handler import format_error_message, format_error_html, ERROR_MESSAGES
 except ImportError:
     # Define minimal versions if error_handler.py is not available
+    ERROR_MESSAGES = {
+        "unknown_error": {
+            "category": "unknown",
+            "message": "An unknown error occurred.",
+            "suggestion": "Check the application logs for more details."
+        }
+    }
+    
     def format_error_message(exception, include_exception_details=False):
         return {
             "category": "Error",
@@ -37,40 +58,145 @@ except ImportError:
         </div>
         """
 
+# crawl4ai is imported up front; the app still starts without it and
+# crawls fail with a clear error instead
+try:
+    import crawl4ai
+except ImportError:
+    crawl4ai = None
+
+# orjson is optional; fall back to the standard library encoder without it
 try:
-    from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, jsonify
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, send_file, abort, Response, stream_with_context
+    from werkzeug.utils import safe_join
 except ImportError:
     print("Flask is not installed. Please install with: pip install flask")
     print("Then restart the application.")
     sys.exit(1)
 
 # Import app and database
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import load_only
 from app import app, db
-from models import CrawlJob, CrawlResult, Setting
+from models import CrawlJob, CrawlResult, BatchJob, BatchJobItem, Setting
 
 # Default directories
 RESULTS_DIR = Path('./results')
 DOWNLOADS_DIR = Path('./downloads')
 
+# Optional feature modules, detected once at import time
+HAS_PLAYWRIGHT = False
+HAS_PYPDF2 = False
+HAS_OPENAI = False
+HAS_LANGCHAIN = False
+
+def refresh_feature_flags():
+    """Re-detect which optional feature modules are importable."""
+    global HAS_PLAYWRIGHT, HAS_PYPDF2, HAS_OPENAI, HAS_LANGCHAIN
+    # Drop cached directory listings so freshly pip-installed packages are found
+    importlib.invalidate_caches()
+    HAS_PLAYWRIGHT = importlib.util.find_spec('playwright') is not None
+    HAS_PYPDF2 = importlib.util.find_spec('PyPDF2') is not None
+    HAS_OPENAI = importlib.util.find_spec('openai') is not None
+    HAS_LANGCHAIN = importlib.util.find_spec('langchain') is not None
+
+refresh_feature_flags()
+
+# How long, in seconds, a /check-features answer is reused
+FEATURE_CHECK_TTL = 30
+
+# Background executor for crawl jobs submitted through /crawl, sized to the
+# default max_concurrent_jobs setting
+_crawl_executor = ThreadPoolExecutor(max_workers=5, thread_name_prefix='crawl')
+
+# Matches one whitespace-delimited word
+_WORD_RE = re.compile(r'\S+')
+
+def count_words(text):
+    """Count whitespace-delimited words without building a list of them."""
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
+# Directories already created by this process, so repeat calls skip the mkdir
+_KNOWN_DIRS: set = set()
+
 def ensure_directory(directory: Path) -> Path:
     """Ensure the directory exists and return the Path object."""
-    directory.mkdir(parents=True, exist_ok=True)
+    directory = Path(directory)
+    key = str(directory)
+    if key not in _KNOWN_DIRS:
+        directory.mkdir(parents=True, exist_ok=True)
+        _KNOWN_DIRS.add(key)
     return directory
 
 # Ensure directories exist
 ensure_directory(RESULTS_DIR)
 ensure_directory(DOWNLOADS_DIR)
 
+# Translation table for turning a URL's host[:port] into a filename-safe slug
+_NETLOC_TRANS = str.maketrans({'.': '_', ':': '_', '/': '_'})
+
+# The host[:port] ends at the first path, query or fragment delimiter
+_NETLOC_END_RE = re.compile(r'[/?#]')
+
+def url_to_slug(url):
+    """Turn a URL's host[:port] into a filename-safe slug, e.g. 'example_com'."""
+    return _NETLOC_END_RE.split(url.split('//', 1)[-1], 1)[0].translate(_NETLOC_TRANS)
+
+# Ports implied by the scheme, dropped when canonicalizing URLs
+_DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+def canonicalize_url(url):
+    """
+    Normalize a URL so trivially different spellings compare equal.
+    
+    Lower-cases the scheme and host, drops the default port and fragment,
+    and strips trailing slashes from the path.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    host, sep, port = netloc.rpartition(':')
+    if sep and port == _DEFAULT_PORTS.get(scheme):
+        netloc = host
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((scheme, netloc, path, parts.query, ''))
+
+def dedupe_urls(urls):
+    """
+    Group URLs by canonical form, keeping the first spelling submitted.
+    
+    Returns a {canonical: url} dict in submission order, and a list of the
+    URLs that could not be parsed at all (e.g. 'http://[oops').
+    """
+    unique, invalid = {}, []
+    for url in urls:
+        try:
+            unique.setdefault(canonicalize_url(url), url)
+        except ValueError:
+            invalid.append(url)
+    return unique, invalid
+
 @app.route('/')
 def home():
     """Home page route"""
     return render_template('index.html')
 
+# Number of jobs shown per page of the job history
+JOBS_PER_PAGE = 50
+
 @app.route('/jobs')
 def job_list():
-    """List all crawl jobs"""
-    jobs = CrawlJob.query.order_by(CrawlJob.created_at.desc()).all()
-    return render_template('jobs.html', jobs=jobs)
+    """List crawl jobs, newest first, one page at a time"""
+    page = request.args.get('page', 1, type=int)
+    pagination = CrawlJob.query.order_by(CrawlJob.created_at.desc()).paginate(
+        page=page, per_page=JOBS_PER_PAGE, error_out=False
+    )
+    return render_template('jobs.html', jobs=pagination.items, pagination=pagination)
 
 @app.route('/job/<int:job_id>')
 def job_detail(job_id):
@@ -81,7 +207,7 @@ def job_detail(job_id):
 
 @app.route('/crawl', methods=['POST'])
 def run_crawl():
-    """Run the crawler with the provided options"""
+    """Queue a crawl job with the provided options"""
     # Get form data
     crawl_type = request.form.get('crawl_type', 'single')
     url = request.form.get('url', '')
@@ -101,9 +227,14 @@ def run_crawl():
         flash('Please enter at least one URL', 'error')
         return redirect(url_for('home'))
     
-    # Clean up URLs (remove empty lines)
+    # Clean up URLs (remove empty lines and duplicates, keeping submission order)
     if crawl_type == 'multiple':
-        urls = [u.strip() for u in urls if u.strip()]
+        unique_urls, invalid_urls = dedupe_urls(u for u in urls if u.strip())
+        if invalid_urls:
+            flash(f'Found {len(invalid_urls)} invalid URLs. Please check your input.', 'warning')
+            if not unique_urls:
+                return redirect(url_for('home'))
+        urls = list(unique_urls)
     
     # Additional options for deep crawl
     max_depth = int(request.form.get('max_depth', 2))
@@ -154,7 +285,7 @@ def run_crawl():
         use_scheduled_breaks=use_scheduled_breaks,
         requests_before_break=requests_before_break,
         break_duration=break_duration,
-        status='running',
+        status='pending',
         created_at=datetime.utcnow()
     )
     
@@ -162,205 +293,275 @@ def run_crawl():
     db.session.add(job)
     db.session.commit()
     
-    try:
-        # Import crawl4ai here to avoid startup errors if not installed
-        try:
-            import crawl4ai
-        except ImportError:
+    # Check for browser support if needed
+    if use_browser:
+        if not HAS_PLAYWRIGHT:
             job.status = 'failed'
-            job.error_message = 'crawl4ai library is not installed'
+            job.error_message = "Browser-based crawling requires the 'playwright' module. Please install it from the Settings page."
             db.session.commit()
-            flash('crawl4ai library is not installed. Please install with: pip install crawl4ai', 'error')
-            return redirect(url_for('home'))
-        
-        # Check for browser support if needed
-        if use_browser:
-            import importlib.util
-            browser_module = importlib.util.find_spec('playwright')
-            if not browser_module:
-                job.status = 'failed'
-                job.error_message = "Browser-based crawling requires the 'playwright' module. Please install it from the Settings page."
-                db.session.commit()
-                flash("Browser-based crawling requires the 'playwright' module. Please install it from the Settings page.", 'error')
-                return redirect(url_for('job_detail', job_id=job.id))
+            flash("Browser-based crawling requires the 'playwright' module. Please install it from the Settings page.", 'error')
+            return redirect(url_for('job_detail', job_id=job.id))
+    
+    # Check for PDF support if downloading PDF files
+    if crawl_type == 'files' and 'pdf' in file_types.lower():
+        if not HAS_PYPDF2:
+            flash("PDF processing is available but requires the 'PyPDF2' module. Files will be downloaded but content extraction may be limited.", 'warning')
+    
+    # Hand the crawl to the background executor and return immediately
+    future = _crawl_executor.submit(execute_crawl, job.id)
+    future.add_done_callback(functools.partial(_on_crawl_done, job.id))
+    
+    flash('Crawl job started. Results will appear here as soon as it finishes.', 'success')
+    return redirect(url_for('job_detail', job_id=job.id))
+
+@app.route('/job/<int:job_id>/status')
+def job_status(job_id):
+    """Return the current status of a crawl job, with the rest of its record, as JSON"""
+    job = CrawlJob.query.get_or_404(job_id)
+    return json_response(job.to_dict())
+
+def execute_crawl(job_id):
+    """
+    Run a crawl job in the background.
+    
+    This function is submitted to the crawl executor by run_crawl. It reads the
+    crawl options back from the job record, crawls, and records the outcome
+    on the job so job_detail and job_status can report it.
+    """
+    with app.app_context():
+        job = db.session.get(CrawlJob, job_id)
+        if not job:
+            logger.error(f"Crawl job {job_id} not found")
+            return
         
-        # Check for PDF support if downloading PDF files
-        if crawl_type == 'files' and 'pdf' in file_types.lower():
-            import importlib.util
-            pdf_module = importlib.util.find_spec('PyPDF2')
-            if not pdf_module:
-                flash("PDF processing is available but requires the 'PyPDF2' module. Files will be downloaded but content extraction may be limited.", 'warning')
+        job.status = 'running'
+        db.session.commit()
         
-        # Set up crawler with common options
-        crawler = crawl4ai.Crawler(
-            use_browser=use_browser,
-            include_images=include_images,
-            include_links=include_links,
-            stay_within_domain=(stay_within_domain if crawl_type == 'deep' else True),
-            # Speed limiting options
-            use_random_delay=use_random_delay,
-            random_delay_min=random_delay_min,
-            random_delay_max=random_delay_max,
-            use_adaptive_delay=use_adaptive_delay,
-            adaptive_delay_factor=adaptive_delay_factor,
-            use_scheduled_breaks=use_scheduled_breaks,
-            requests_before_break=requests_before_break,
-            break_duration=break_duration
-        )
+        # Load all settings once for the whole crawl
+        settings = {setting.key: setting.value for setting in Setting.query.all()}
         
-        results = []
-        output_files = []
+        crawl_type = job.crawl_type
+        url = job.url
+        output_path = ensure_directory(job.output_dir)
+        output_format = job.format
         
-        # Execute based on crawl type
-        if crawl_type == 'single':
-            # Single URL crawl
-            result = crawler.crawl_url(url)
-            results = [result]
-            
-            # Generate filename from URL
-            parsed_url = urlparse(url)
-            domain = parsed_url.netloc.replace('.', '_')
-            filename = f"{domain}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        try:
+            if crawl4ai is None:
+                job.status = 'failed'
+                job.error_message = 'crawl4ai library is not installed'
+                job.completed_at = datetime.utcnow()
+                db.session.commit()
+                return
             
-            # Save result
-            output_file = save_result(result, output_path, output_format, filename)
-            output_files = [output_file]
+            # Set up crawlers with common options
+            make_crawler = functools.partial(
+                crawl4ai.Crawler,
+                use_browser=job.use_browser,
+                include_images=job.include_images,
+                include_links=job.include_links,
+                stay_within_domain=(job.stay_within_domain if crawl_type == 'deep' else True),
+                # Speed limiting options
+                use_random_delay=job.use_random_delay,
+                random_delay_min=job.random_delay_min,
+                random_delay_max=job.random_delay_max,
+                use_adaptive_delay=job.use_adaptive_delay,
+                adaptive_delay_factor=job.adaptive_delay_factor,
+                use_scheduled_breaks=job.use_scheduled_breaks,
+                requests_before_break=job.requests_before_break,
+                break_duration=job.break_duration
+            )
+            # Multiple-URL crawls build one crawler per concurrent slot instead
+            crawler = make_crawler() if crawl_type != 'multiple' else None
             
-            # Save result to database
-            save_result_to_db(job.id, result, output_file)
+            results = []
+            failures = []
+            output_files = []
+            rows = []
             
-        elif crawl_type == 'multiple':
-            # Multiple URLs crawl
-            results = crawler.crawl_urls(urls)
+            # One timestamp per crawl; multi-page results add an index suffix
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             
-            # Save each result
-            for i, result in enumerate(results):
-                url = result.get('url', f'unknown_{i}')
-                parsed_url = urlparse(url)
-                domain = parsed_url.netloc.replace('.', '_')
-                filename = f"{domain}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            # Execute based on crawl type
+            if crawl_type == 'single':
+                # Single URL crawl
+                result = crawler.crawl_url(url)
+                results = [result]
+                
+                # Generate filename from URL
+                domain = url_to_slug(url)
+                filename = f"{domain}_{timestamp}"
                 
+                # Save result
                 output_file = save_result(result, output_path, output_format, filename)
-                output_files.append(output_file)
+                output_files = [output_file]
                 
-                # Save result to database
-                save_result_to_db(job.id, result, output_file)
+                # Queue result row for the database
+                rows.append(build_result_row(job.id, result, output_file))
                 
-        elif crawl_type == 'deep':
-            # Deep crawl
-            results = crawler.deep_crawl(
-                start_url=url,
-                max_depth=max_depth,
-                max_pages=max_pages
-            )
-            
-            # Save each result
-            for i, result in enumerate(results):
-                filename = f"page_{i+1}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                output_file = save_result(result, output_path, output_format, filename)
-                output_files.append(output_file)
+            elif crawl_type == 'multiple':
+                # Multiple URLs crawl, fetched concurrently
+                concurrency = int(settings.get('max_concurrent_jobs') or 5)
+                results, failures = asyncio.run(crawl_many(make_crawler, job.urls, concurrency))
                 
-                # Save result to database
-                save_result_to_db(job.id, result, output_file)
+                # Save each result (JSON results share one NDJSON file per job)
+                with open_result_stream(output_path, output_format, job.id) as ndjson_file:
+                    for i, result in enumerate(results):
+                        if ndjson_file is not None:
+                            output_file = append_ndjson_result(ndjson_file, result)
+                        else:
+                            url = result.get('url', f'unknown_{i}')
+                            domain = url_to_slug(url)
+                            filename = f"{domain}_{timestamp}_{i:04d}"
+                            output_file = save_result(result, output_path, output_format, filename)
+                        output_files.append(output_file)
+                        
+                        # Queue result row for the database
+                        rows.append(build_result_row(job.id, result, output_file))
+                    
+            elif crawl_type == 'deep':
+                # Deep crawl
+                results = crawler.deep_crawl(
+                    start_url=url,
+                    max_depth=job.max_depth,
+                    max_pages=job.max_pages
+                )
                 
-        elif crawl_type == 'files':
-            # File download
-            file_ext_list = [ext.strip() for ext in file_types.split(',')]
-            files = crawler.find_files(
-                url=url,
-                file_types=file_ext_list,
-                max_size_mb=max_size,
-                max_files=max_files
-            )
+                # Save each result (JSON results share one NDJSON file per job)
+                with open_result_stream(output_path, output_format, job.id) as ndjson_file:
+                    for i, result in enumerate(results):
+                        if ndjson_file is not None:
+                            output_file = append_ndjson_result(ndjson_file, result)
+                        else:
+                            filename = f"page_{i+1}_{timestamp}"
+                            output_file = save_result(result, output_path, output_format, filename)
+                        output_files.append(output_file)
+                        
+                        # Queue result row for the database
+                        rows.append(build_result_row(job.id, result, output_file))
+                    
+            elif crawl_type == 'files':
+                # File download
+                file_ext_list = [ext.strip() for ext in job.file_types.split(',')]
+                files = crawler.find_files(
+                    url=url,
+                    file_types=file_ext_list,
+                    max_size_mb=job.max_size,
+                    max_files=job.max_files
+                )
+                
+                # Download files
+                for file_url in files or []:
+                    file_path = crawler.download_file(file_url, str(output_path))
+                    if file_path:
+                        output_files.append(file_path)
+            
+            # Save all results to the database in one executemany
+            if rows:
+                db.session.bulk_insert_mappings(CrawlResult, rows)
+            
+            # Record URLs that failed; the job only fails if none succeeded
+            if failures:
+                error_info = format_error_message(failures[0][1], include_exception_details=True)
+                error_info['message'] = f"{len(failures)} of {len(job.urls)} URLs failed. {error_info['message']}"
+                error_info['failed_urls'] = [failed_url for failed_url, _ in failures]
+                job.error_message = error_info
+            
+            # Update job status
+            job.status = 'failed' if failures and not results else 'completed'
+            job.completed_at = datetime.utcnow()
+            job.pages_crawled = len(results)
+            job.files_downloaded = len(output_files) if crawl_type == 'files' else 0
+            db.session.commit()
+            logger.info(f"Crawl job {job_id} {job.status}")
             
-            if not files:
-                job.status = 'completed'
+        except Exception as e:
+            logger.error(f"Crawling error: {str(e)}")
+            db.session.rollback()
+            
+            # Format the error message using our error handler
+            error_info = format_error_message(e, include_exception_details=True)
+            
+            # Update job status with detailed error info
+            job.status = 'failed'
+            job.error_message = error_info
+            job.completed_at = datetime.utcnow()
+            db.session.commit()
+
+def _on_crawl_done(job_id, future):
+    """
+    Log a crawl that raised outside execute_crawl's own error handling and
+    mark its job failed, so it isn't left 'running' forever.
+    """
+    exc = future.exception()
+    if exc is None:
+        return
+    logger.error(f"Crawl job {job_id} crashed: {str(exc)}", exc_info=exc)
+    with app.app_context():
+        try:
+            db.session.rollback()
+            job = db.session.get(CrawlJob, job_id)
+            if job and job.status in ('pending', 'running'):
+                job.status = 'failed'
+                job.error_message = format_error_message(exc, include_exception_details=True)
                 job.completed_at = datetime.utcnow()
-                job.files_downloaded = 0
                 db.session.commit()
-                
-                flash('No matching files found', 'warning')
-                return redirect(url_for('job_detail', job_id=job.id))
-            
-            # Download files
-            for file_url in files:
-                file_path = crawler.download_file(file_url, str(output_path))
-                if file_path:
-                    output_files.append(file_path)
-        
-        # Update job status
-        job.status = 'completed'
-        job.completed_at = datetime.utcnow()
-        job.pages_crawled = len(results)
-        job.files_downloaded = len(output_files) if crawl_type == 'files' else 0
-        db.session.commit()
-        
-        # Flash success message
-        if crawl_type == 'files':
-            flash(f'Successfully downloaded {len(output_files)} files', 'success')
+        except Exception as inner_e:
+            logger.error(f"Error updating crawl job {job_id} status: {str(inner_e)}")
+
+async def crawl_many(make_crawler, urls, concurrency):
+    """
+    Crawl several URLs concurrently, at most `concurrency` at a time.
+    
+    Each blocking crawl_url call runs in a worker thread. A Crawler keeps
+    per-instance delay and break counters that are not thread-safe, so every
+    concurrent slot gets its own crawler from `make_crawler` and a crawler is
+    only ever used by one thread at a time.
+    
+    Returns (results, failures): the results in input order, and a
+    (url, exception) pair for every URL that failed.
+    """
+    crawlers = asyncio.Queue()
+    for _ in range(max(1, min(concurrency, len(urls)))):
+        crawlers.put_nowait(make_crawler())
+    
+    async def crawl_one(url):
+        crawler = await crawlers.get()
+        try:
+            return await asyncio.to_thread(crawler.crawl_url, url)
+        finally:
+            crawlers.put_nowait(crawler)
+    
+    outcomes = await asyncio.gather(*(crawl_one(url) for url in urls), return_exceptions=True)
+    
+    results, failures = [], []
+    for url, outcome in zip(urls, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Error crawling {url}: {str(outcome)}")
+            failures.append((url, outcome))
         else:
-            flash(f'Successfully crawled {len(results)} pages', 'success')
-        
-        # Return results list page
-        return render_template(
-            'results.html',
-            crawl_type=crawl_type,
-            results=results,
-            output_files=output_files,
-            output_dir=str(output_path),
-            job_id=job.id
-        )
-        
-    except Exception as e:
-        logger.error(f"Crawling error: {str(e)}")
-        
-        # Format the error message using our error handler
-        error_info = format_error_message(e, include_exception_details=True)
-        
-        # Update job status with detailed error info
-        job.status = 'failed'
-        job.error_message = json.dumps(error_info)
-        job.completed_at = datetime.utcnow()
-        db.session.commit()
-        
-        # Show a helpful flash message
-        flash(f'Error: {error_info["message"]}. {error_info["suggestion"]}', 'error')
-        
-        # Check if this is a common error with a clear solution
-        if error_info["type"] in ["browser_not_available", "dependency_not_installed"]:
-            return redirect(url_for('settings'))
-            
-        return render_template('error.html', 
-                              error=error_info, 
-                              back_url=url_for('home'),
-                              retry_url=url_for('job_detail', job_id=job.id))
+            results.append(outcome)
+    return results, failures
 
-def save_result_to_db(job_id, result, output_file):
-    """Save a crawl result to the database"""
-    try:
-        db_result = CrawlResult(
-            job_id=job_id,
-            url=result.get('url', ''),
-            title=result.get('title', ''),
-            output_file=output_file,
-            content_length=len(result.get('text', '')),
-            word_count=len(result.get('text', '').split()),
-            link_count=len(result.get('links', [])),
-            image_count=len(result.get('images', [])),
-            created_at=datetime.utcnow()
-        )
-        db.session.add(db_result)
-        db.session.commit()
-    except Exception as e:
-        logger.error(f"Error saving result to database: {str(e)}")
-        error_info = format_error_message(e)
-        flash(f"Error saving results: {error_info['message']}", 'warning')
+def build_result_row(job_id, result, output_file, created_at=None):
+    """Build the CrawlResult column mapping for a crawl result, for bulk insertion"""
+    return {
+        'job_id': job_id,
+        'url': result.get('url', ''),
+        'title': result.get('title', ''),
+        'output_file': output_file,
+        'content_length': len(result.get('text', '')),
+        'word_count': count_words(result.get('text', '')),
+        'link_count': len(result.get('links', [])),
+        'image_count': len(result.get('images', [])),
+        'created_at': created_at or datetime.utcnow()
+    }
 
 def save_result(result, output_dir, format_type, filename):
-    """Save the crawl result to the specified directory with the given format."""
-    # Ensure directory exists
-    output_dir = Path(output_dir)
-    output_dir.mkdir(parents=True, exist_ok=True)
+    """
+    Save the crawl result to the specified directory with the given format.
+    
+    The caller must make sure output_dir exists (see ensure_directory).
+    """
     
     # Add appropriate extension based on format
     if format_type == 'markdown' or format_type == 'md':
@@ -374,31 +575,129 @@ def save_result(result, output_dir, format_type, filename):
         content = result.get('text', '')
     elif format_type == 'json':
         filename = f"{filename}.json"
-        content = json.dumps(result, indent=2)
+        content = dump_json(result, indent=True)
     else:
         # Default to markdown
         filename = f"{filename}.md"
         content = result.get('markdown', '')
     
-    # Write content to file
-    file_path = output_dir / filename
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
+    # Write content to file, encoding once and bypassing the text layer
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    file_path = Path(output_dir) / filename
+    file_path.write_bytes(content)
     
     return str(file_path)
 
+def dump_json(obj, indent=False):
+    """Serialize an object to UTF-8 JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    # orjson writes datetimes natively; match its output without it
+    return json.dumps(obj, indent=2 if indent else None, default=datetime.isoformat).encode('utf-8')
+
+def json_response(payload, status=200):
+    """Return a JSON response encoded with dump_json rather than Flask's jsonify."""
+    return Response(dump_json(payload), status=status, mimetype='application/json')
+
+def open_result_stream(output_dir, format_type, job_id):
+    """
+    Open the per-job NDJSON file that JSON results are appended to.
+    
+    Returns a null context (yielding None) for every other format, so callers
+    fall back to writing one file per result.
+    """
+    if format_type != 'json':
+        return contextlib.nullcontext()
+    return open(Path(output_dir) / f'job_{job_id}.ndjson', 'ab', buffering=1 << 20)
+
+def append_ndjson_result(ndjson_file, result):
+    """
+    Append a result as one NDJSON record.
+    
+    Returns the record locator stored in CrawlResult.output_file, in the form
+    ``<path>#<offset>:<length>``.
+    """
+    offset = ndjson_file.tell()
+    record = dump_json(result) + b'\n'
+    ndjson_file.write(record)
+    return f"{ndjson_file.name}#{offset}:{len(record)}"
+
+def read_ndjson_record(file_path, locator):
+    """Read a single record from an NDJSON file given its ``offset:length`` locator."""
+    offset, length = (int(part) for part in locator.split(':', 1))
+    with open(file_path, 'rb') as f:
+        f.seek(offset)
+        return json.loads(f.read(length))
+
 @app.route('/download/<path:filename>')
 def download_file(filename):
     """Download a specific file."""
-    return send_from_directory(RESULTS_DIR, filename, as_attachment=True)
+    # NDJSON record locators download the whole job file
+    filename = filename.split('#', 1)[0]
+    # send_from_directory applies safe_join and handles If-Modified-Since / ETag
+    return send_from_directory(RESULTS_DIR, filename, as_attachment=True, conditional=True)
+
+def _render_markdown(content):
+    """Render a Markdown result"""
+    return 'view_markdown.html', {'content': content}
+
+def _render_json(content):
+    """Pretty-print a JSON result, falling back to plain text if it doesn't parse"""
+    # Files written by save_result are already indented; show them as they are
+    if content.lstrip().startswith(('{\n ', '[\n ')):
+        return 'view_json.html', {'content': content}
+    try:
+        return 'view_json.html', {'content': dump_json(json.loads(content), indent=True).decode('utf-8')}
+    except json.JSONDecodeError:
+        flash("Cannot parse JSON file. Viewing as plain text instead.", 'warning')
+        return _render_text(content)
+
+def _render_text(content):
+    """Render any other file as plain text"""
+    return 'view_text.html', {'content': content}
+
+# View handlers keyed by lower-case file extension
+_VIEW_HANDLERS = {
+    '.md': _render_markdown,
+    '.json': _render_json,
+}
+
+@app.route('/raw/<path:filename>')
+def raw_file(filename):
+    """Serve a result file inline, with conditional and range request support."""
+    safe_path = safe_join(str(RESULTS_DIR), filename)
+    if safe_path is None or not os.path.isfile(safe_path):
+        abort(404)
+    response = send_file(safe_path, conditional=True)
+    # Scraped pages must not run scripts with this app's origin
+    response.headers['Content-Security-Policy'] = 'sandbox'
+    return response
 
 @app.route('/view/<path:filename>')
 def view_file(filename):
     """View a specific file."""
+    # NDJSON results are addressed as <file>#<offset>:<length>
+    filename, _, locator = filename.partition('#')
+    
+    # Reject paths escaping RESULTS_DIR before touching the filesystem
+    safe_path = safe_join(str(RESULTS_DIR), filename)
+    if safe_path is None:
+        abort(404)
+    
+    if locator:
+        if not os.path.isfile(safe_path):
+            abort(404)
+        try:
+            record = read_ndjson_record(safe_path, locator)
+        except (ValueError, OSError):
+            abort(404)
+        return render_template('view_json.html', filename=filename, content=dump_json(record, indent=True).decode('utf-8'))
+    
     try:
-        file_path = Path(RESULTS_DIR) / filename
+        file_path = Path(safe_path)
         
-        if not file_path.exists():
+        if not os.path.isfile(safe_path):
             error_info = {
                 "category": "File Error",
                 "message": f"File not found: {filename}",
@@ -407,48 +706,23 @@ def view_file(filename):
             flash(f'File not found: {filename}', 'error')
             return render_template('error.html', error=error_info, back_url=url_for('job_list'))
         
-        # Try to read the file
+        # The HTML viewer loads the file itself through raw_file
+        ext = os.path.splitext(filename)[1].lower()
+        if ext == '.html':
+            return render_template('view_html.html', filename=filename)
+        
+        # Read the file once, then decode in memory (latin-1 accepts any byte)
+        data = file_path.read_bytes()
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = data.decode('utf-8')
         except UnicodeDecodeError:
-            # Try with a different encoding
-            try:
-                with open(file_path, 'r', encoding='latin-1') as f:
-                    content = f.read()
-            except Exception:
-                error_info = {
-                    "category": "File Error",
-                    "message": f"Cannot read file: {filename}",
-                    "suggestion": "The file encoding is not supported. Try downloading the file instead of viewing it."
-                }
-                return render_template('error.html', error=error_info, 
-                                      back_url=url_for('job_list'),
-                                      retry_url=url_for('download_file', filename=filename))
+            content = data.decode('latin-1')
+        del data
         
-        # Determine file type
-        if filename.endswith('.md'):
-            # This template would include a Markdown renderer
-            return render_template('view_markdown.html', filename=filename, content=content)
-        elif filename.endswith('.html'):
-            # This displays the HTML in an iframe or directly
-            return render_template('view_html.html', filename=filename, content=content)
-        elif filename.endswith('.json'):
-            # Pretty-print JSON
-            try:
-                pretty_json = json.dumps(json.loads(content), indent=4)
-                return render_template('view_json.html', filename=filename, content=pretty_json)
-            except json.JSONDecodeError:
-                error_info = {
-                    "category": "Parse Error",
-                    "message": "Cannot parse JSON file",
-                    "suggestion": "The file doesn't contain valid JSON data. Viewing as plain text instead."
-                }
-                flash("Cannot parse JSON file. Viewing as plain text instead.", 'warning')
-                return render_template('view_text.html', filename=filename, content=content)
-        else:
-            # Plain text view
-            return render_template('view_text.html', filename=filename, content=content)
+        # Dispatch on the file extension
+        handler = _VIEW_HANDLERS.get(ext, _render_text)
+        template_name, context = handler(content)
+        return render_template(template_name, filename=filename, **context)
             
     except Exception as e:
         # Use our error handler for any other exceptions
@@ -463,16 +737,27 @@ def view_file(filename):
 def settings():
     """View and edit application settings"""
     if request.method == 'POST':
-        # Update settings
-        for key, value in request.form.items():
-            if key.startswith('setting_'):
-                setting_key = key[8:]  # Remove 'setting_' prefix
-                setting = Setting.query.filter_by(key=setting_key).first()
-                if setting:
-                    setting.value = value
-                else:
-                    setting = Setting(key=setting_key, value=value)
-                    db.session.add(setting)
+        # Collect submitted settings (strip the 'setting_' prefix)
+        submitted = {
+            key[8:]: value for key, value in request.form.items() if key.startswith('setting_')
+        }
+        
+        # Look up the existing rows once, then update and insert in bulk
+        existing_ids = dict(
+            db.session.query(Setting.key, Setting.id).filter(Setting.key.in_(list(submitted))).all()
+        )
+        updates = [
+            {'id': existing_ids[key], 'value': value}
+            for key, value in submitted.items() if key in existing_ids
+        ]
+        inserts = [
+            {'key': key, 'value': value}
+            for key, value in submitted.items() if key not in existing_ids
+        ]
+        if updates:
+            db.session.bulk_update_mappings(Setting, updates)
+        if inserts:
+            db.session.bulk_insert_mappings(Setting, inserts)
         
         db.session.commit()
         flash('Settings updated successfully', 'success')
@@ -480,7 +765,8 @@ def settings():
     
     # Get all settings
     all_settings = Setting.query.all()
-    return render_template('settings.html', settings=all_settings)
+    installing = [feature for feature, install_job in _install_jobs.items() if not install_job['done']]
+    return render_template('settings.html', settings=all_settings, installing=installing)
 
 # Initialize default settings if they don't exist
 def init_default_settings():
@@ -505,22 +791,9 @@ def init_default_settings():
     }
     
     # Add optional feature settings
-    import importlib.util
-    
-    # Check if PDF features are installed
-    spec = importlib.util.find_spec('PyPDF2')
-    default_settings['feature_pdf_installed'] = 'true' if spec else 'false'
-    
-    # Check if browser features are installed
-    spec = importlib.util.find_spec('playwright')
-    default_settings['feature_browser_installed'] = 'true' if spec else 'false'
-    
-    # Check if LLM features are installed
-    spec = importlib.util.find_spec('openai')
-    llm_part1 = spec is not None
-    spec = importlib.util.find_spec('langchain')
-    llm_part2 = spec is not None
-    default_settings['feature_llm_installed'] = 'true' if (llm_part1 and llm_part2) else 'false'
+    default_settings['feature_pdf_installed'] = 'true' if HAS_PYPDF2 else 'false'
+    default_settings['feature_browser_installed'] = 'true' if HAS_PLAYWRIGHT else 'false'
+    default_settings['feature_llm_installed'] = 'true' if (HAS_OPENAI and HAS_LANGCHAIN) else 'false'
     
     # Apply settings
     for key, value in default_settings.items():
@@ -534,105 +807,153 @@ def init_default_settings():
     
     db.session.commit()
 
-# Add route for installing features
-@app.route('/install-feature/<feature>')
-def install_feature(feature):
-    """Install optional crawl4ai features"""
-    import subprocess
-    import sys
-
-    # Define valid features and associated packages
-    feature_packages = {
-        'pdf': ['PyPDF2'],
-        'browser': ['playwright'],
-        'llm': ['openai', 'langchain'],
-        'all': ['PyPDF2', 'playwright', 'openai', 'langchain']
-    }
-    
-    if feature not in feature_packages:
-        flash(f'Invalid feature: {feature}', 'error')
-        return redirect(url_for('settings'))
+# Optional features and the packages they install
+FEATURE_PACKAGES = {
+    'pdf': ['PyPDF2'],
+    'browser': ['playwright'],
+    'llm': ['openai', 'langchain'],
+    'all': ['PyPDF2', 'playwright', 'openai', 'langchain']
+}
+
+# Feature installs run one at a time off the request thread. Each entry in
+# _install_jobs holds the install log, streamed to the settings page over SSE.
+_install_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='install')
+_install_jobs = {}
+
+def _append_install_log(install_job, line):
+    """Append a line to an install job's log and wake any streaming clients"""
+    with install_job['cond']:
+        install_job['log'].append(line)
+        install_job['cond'].notify_all()
+
+def _run_install_command(install_job, cmd):
+    """Run an install command, copying its output into the job log. Returns the exit code."""
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    for line in process.stdout:
+        _append_install_log(install_job, line.rstrip())
+    return process.wait()
+
+def _do_install(feature):
+    """
+    Install the packages for an optional feature in the background.
     
-    packages = feature_packages[feature]
+    Progress is written to the feature's install job log; on success the
+    feature flags are refreshed and the installation is recorded in settings.
+    """
+    install_job = _install_jobs[feature]
+    success = False
     try:
         # Install packages using pip
-        for package in packages:
-            result = subprocess.run(
-                [sys.executable, '-m', 'pip', 'install', package],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            logger.info(f"Installed {package}: {result.stdout}")
+        for package in FEATURE_PACKAGES[feature]:
+            _append_install_log(install_job, f"Installing {package}...")
+            if _run_install_command(install_job, [sys.executable, '-m', 'pip', 'install', package]) != 0:
+                raise RuntimeError(f"pip install {package} failed")
+            logger.info(f"Installed {package}")
         
         # For browser feature, we need to install playwright browsers
         if feature == 'browser' or feature == 'all':
-            try:
-                result = subprocess.run(
-                    [sys.executable, '-m', 'playwright', 'install'],
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
-                logger.info(f"Installed playwright browsers: {result.stdout}")
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Error installing playwright browsers: {e}")
-                flash(f'Error installing playwright browsers: {e}', 'error')
+            _append_install_log(install_job, "Installing playwright browsers...")
+            if _run_install_command(install_job, [sys.executable, '-m', 'playwright', 'install']) != 0:
+                logger.error("Error installing playwright browsers")
+                _append_install_log(install_job, "Error installing playwright browsers")
         
-        # Record installation in settings
-        feature_setting_key = f"feature_{feature}_installed"
-        setting = Setting.query.filter_by(key=feature_setting_key).first()
-        if not setting:
-            setting = Setting(key=feature_setting_key, value='true')
-            db.session.add(setting)
-        else:
-            setting.value = 'true'
-        db.session.commit()
+        # Pick up the newly installed modules
+        refresh_feature_flags()
         
-        flash(f'Successfully installed {feature} feature!', 'success')
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error installing packages: {e}")
+        # Record installation in settings
+        with app.app_context():
+            feature_setting_key = f"feature_{feature}_installed"
+            setting = Setting.query.filter_by(key=feature_setting_key).first()
+            if not setting:
+                setting = Setting(key=feature_setting_key, value='true')
+                db.session.add(setting)
+            else:
+                setting.value = 'true'
+            db.session.commit()
         
-        # Format a helpful error message
-        error_info = {
-            "category": "Dependency Error",
-            "message": f"Failed to install {feature} feature.",
-            "suggestion": "Check your internet connection and try again. If the problem persists, you may need to manually install the packages or contact support."
+        _append_install_log(install_job, f"Successfully installed {feature} feature!")
+        success = True
+    except Exception as e:
+        logger.error(f"Error installing {feature} feature: {str(e)}")
+        _append_install_log(install_job, f"Error installing {feature} feature. Please check your internet connection and try again.")
+    finally:
+        with install_job['cond']:
+            install_job['success'] = success
+            install_job['done'] = True
+            install_job['cond'].notify_all()
+
+# Add route for installing features
+@app.route('/install-feature/<feature>')
+def install_feature(feature):
+    """Start installing optional crawl4ai features in the background"""
+    if feature not in FEATURE_PACKAGES:
+        flash(f'Invalid feature: {feature}', 'error')
+        return redirect(url_for('settings'))
+    
+    install_job = _install_jobs.get(feature)
+    if install_job and not install_job['done']:
+        flash(f'The {feature} feature is already being installed.', 'info')
+    else:
+        _install_jobs[feature] = {
+            'log': [],
+            'done': False,
+            'success': None,
+            'cond': threading.Condition()
         }
-        
-        # If we have stderr output, include it for more detail
-        if e.stderr:
-            error_info["exception"] = {
-                "type": "Installation Error",
-                "message": e.stderr
-            }
-            
-        # Save the error in a session variable to display on the error page
-        flash(f'Error installing {feature} feature. Please check your internet connection and try again.', 'error')
-        
-        # Log detailed error
-        logger.error(f"Package installation error: {e.stderr if e.stderr else str(e)}")
+        _install_executor.submit(_do_install, feature)
+        flash(f'Installing the {feature} feature in the background. Progress is shown below.', 'info')
     
     return redirect(url_for('settings'))
 
+@app.route('/install-feature/<feature>/stream')
+def install_feature_stream(feature):
+    """Stream the progress of a feature install as Server-Sent Events"""
+    install_job = _install_jobs.get(feature)
+    if install_job is None:
+        abort(404)
+    
+    def generate():
+        sent = 0
+        while True:
+            with install_job['cond']:
+                if sent == len(install_job['log']) and not install_job['done']:
+                    install_job['cond'].wait(timeout=15)
+                lines = install_job['log'][sent:]
+                done = install_job['done']
+                success = install_job['success']
+            sent += len(lines)
+            
+            for line in lines:
+                yield f"data: {json.dumps({'line': line})}\n\n"
+            if done:
+                yield f"event: done\ndata: {json.dumps({'success': success})}\n\n"
+                return
+            if not lines:
+                # Heartbeat so proxies keep the connection open
+                yield ": keepalive\n\n"
+    
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
 # Add route for status check of optional features
 @app.route('/check-features')
 def check_features():
     """Check which optional features are available"""
-    import importlib.util
+    return json_response(_features_snapshot(int(time.time()) // FEATURE_CHECK_TTL))
+
+@functools.lru_cache(maxsize=1)
+def _features_snapshot(time_bucket):
+    """
+    Re-detect optional features once per time bucket.
     
-    features = {
-        'pdf': {'module': 'PyPDF2', 'installed': False},
-        'browser': {'module': 'playwright', 'installed': False},
-        'llm': {'module': 'openai', 'installed': False}
+    Picks up packages installed by another worker process or by hand, while
+    repeated polls within the same bucket return the cached answer.
+    """
+    refresh_feature_flags()
+    return {
+        'pdf': {'module': 'PyPDF2', 'installed': HAS_PYPDF2},
+        'browser': {'module': 'playwright', 'installed': HAS_PLAYWRIGHT},
+        'llm': {'module': 'openai', 'installed': HAS_OPENAI}
     }
-    
-    # Check which modules are installed
-    for feature, info in features.items():
-        spec = importlib.util.find_spec(info['module'])
-        features[feature]['installed'] = spec is not None
-    
-    return jsonify(features)
 
 # Add a general error route
 @app.route('/error')
@@ -643,7 +964,6 @@ def error_page():
     retry_url = request.args.get('retry_url')
     
     # Get error information from our predefined error types
-    from error_handler import ERROR_MESSAGES
     error_info = ERROR_MESSAGES.get(error_type, ERROR_MESSAGES['unknown_error'])
     
     # Check for custom message
@@ -695,19 +1015,177 @@ def internal_error(error):
     return render_template('error.html', error=error_info, back_url=url_for('home')), 500
 
 # Batch Processing Routes
+# Fast-path check for http(s) URLs with a host
+_HTTP_URL_RE = re.compile(r'^https?://[^\s/?#]+', re.IGNORECASE)
+# Rows per INSERT when adding the URLs of a new batch
+BATCH_ITEM_INSERT_CHUNK = 10_000
+BATCH_ITEMS_PER_PAGE = 50
+ERROR_DETAIL_MAX_LENGTH = 4000
+# Rows fetched per round trip when streaming a batch export
+BATCH_EXPORT_CHUNK = 1000
+# Longest a finished batch item waits in the worker's write buffer, in seconds
+BATCH_FLUSH_INTERVAL = 5
+BATCH_ITEM_TABS = ('all', 'pending', 'processing', 'completed', 'failed')
+ACTIVE_BATCH_STATUSES = frozenset({'pending', 'running', 'paused'})
+FINISHED_BATCH_STATUSES = frozenset({'completed', 'failed'})
+
+# Set by pause/delete so a batch's worker stops picking up new items without
+# re-reading the batch row from the database. The worker removes its own
+# event when it exits, unless a restart has already replaced it.
+_batch_stop_events = {}
+
+def _signal_batch_stop(batch_id, forget=False):
+    """
+    Ask this process's worker for a batch, if any, to stop starting new items.
+    
+    With `forget`, the event is also dropped, for a batch that is going away.
+    """
+    if forget:
+        stop_event = _batch_stop_events.pop(batch_id, None)
+    else:
+        stop_event = _batch_stop_events.get(batch_id)
+    if stop_event is not None:
+        stop_event.set()
+
+# Counters for batches being processed by this process, streamed to the
+# batch detail page over SSE so it doesn't have to be reloaded to follow along.
+# Each run of a batch gets its own entry; the worker holds on to it and only
+# ever updates that one, so a worker left over from before a pause cannot
+# touch the entry of the run that replaced it.
+_batch_progress = {}
+# How often, in seconds, a progress stream served by another process re-reads the batch
+BATCH_PROGRESS_POLL_INTERVAL = 2
+
+def _start_batch_progress(batch):
+    """Begin tracking a run of a batch that is about to be processed, and return its entry"""
+    progress = {
+        'processed': batch.processed_urls,
+        'successful': batch.successful_urls,
+        'failed': batch.failed_urls,
+        'total': batch.total_urls,
+        'done': False,
+        'version': 0,
+        'cond': threading.Condition()
+    }
+    _batch_progress[batch.id] = progress
+    return progress
+
+def _update_batch_progress(progress, succeeded=0, failed=0, done=False):
+    """Add finished items to a run's progress and wake any streaming clients"""
+    if progress is None:
+        return
+    with progress['cond']:
+        progress['processed'] += succeeded + failed
+        progress['successful'] += succeeded
+        progress['failed'] += failed
+        progress['done'] = progress['done'] or done
+        progress['version'] += 1
+        progress['cond'].notify_all()
+
+def _finish_batch_progress(batch_id, progress):
+    """Mark a run's progress done and forget it, unless a newer run has replaced it"""
+    if progress is None:
+        return
+    _update_batch_progress(progress, done=True)
+    if _batch_progress.get(batch_id) is progress:
+        del _batch_progress[batch_id]
+
+@app.route('/batch/<int:batch_id>/progress')
+def batch_progress(batch_id):
+    """Stream a running batch's counters as Server-Sent Events"""
+    progress = _batch_progress.get(batch_id)
+    if progress is None:
+        # Another gunicorn worker process is running the batch, or it has
+        # already stopped; follow the batch row instead, which for a stopped
+        # batch sends its final counters and 'done' straight away
+        if db.session.get(BatchJob, batch_id) is None:
+            abort(404)
+        return Response(stream_with_context(_poll_batch_progress(batch_id)),
+                        mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+    
+    def generate():
+        sent_version = -1
+        while True:
+            with progress['cond']:
+                if sent_version == progress['version'] and not progress['done']:
+                    progress['cond'].wait(timeout=15)
+                changed = sent_version != progress['version']
+                sent_version = progress['version']
+                counts = {key: progress[key] for key in ('processed', 'successful', 'failed', 'total')}
+                done = progress['done']
+            
+            if changed:
+                yield f"data: {json.dumps(counts)}\n\n"
+            if done:
+                yield "event: done\ndata: {}\n\n"
+                return
+            if not changed:
+                # Heartbeat so proxies keep the connection open
+                yield ": keepalive\n\n"
+    
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+def _poll_batch_progress(batch_id):
+    """
+    Yield SSE messages for a batch's counters, re-read from the database
+    until it stops running.
+    
+    The current counters are always sent first, so a client that connects
+    after the batch finished still gets its final numbers before 'done'.
+    """
+    columns = (BatchJob.status, BatchJob.processed_urls, BatchJob.successful_urls,
+               BatchJob.failed_urls, BatchJob.total_urls)
+    sent = None
+    idle = 0
+    while True:
+        row = db.session.execute(select(*columns).where(BatchJob.id == batch_id)).one_or_none()
+        # Don't hold a connection (or a SQLite read snapshot) between polls
+        db.session.close()
+        if row is None:
+            yield "event: done\ndata: {}\n\n"
+            return
+        counts = {
+            'processed': row.processed_urls,
+            'successful': row.successful_urls,
+            'failed': row.failed_urls,
+            'total': row.total_urls
+        }
+        changed = counts != sent
+        if changed:
+            sent = counts
+            idle = 0
+            yield f"data: {json.dumps(counts)}\n\n"
+        if row.status != 'running':
+            yield "event: done\ndata: {}\n\n"
+            return
+        if not changed:
+            idle += BATCH_PROGRESS_POLL_INTERVAL
+            if idle >= 15:
+                # Heartbeat so proxies keep the connection open
+                idle = 0
+                yield ": keepalive\n\n"
+        time.sleep(BATCH_PROGRESS_POLL_INTERVAL)
+
 @app.route('/batches')
 def batch_jobs():
     """List all batch jobs"""
     # Get active (pending, running, paused) and completed (completed, failed) batch jobs
-    from models import BatchJob
-    
-    active_batches = BatchJob.query.filter(
-        BatchJob.status.in_(['pending', 'running', 'paused'])
+    # Fetch both groups in one query and split them in Python
+    # Only the columns the cards show; the crawl options stay on disk
+    all_batches = BatchJob.query.options(load_only(
+        BatchJob.name, BatchJob.description, BatchJob.status, BatchJob.created_at,
+        BatchJob.completed_at, BatchJob.total_urls, BatchJob.processed_urls,
+        BatchJob.successful_urls, BatchJob.failed_urls,
+    )).filter(
+        BatchJob.status.in_(sorted(ACTIVE_BATCH_STATUSES | FINISHED_BATCH_STATUSES))
     ).order_by(BatchJob.created_at.desc()).all()
     
-    completed_batches = BatchJob.query.filter(
-        BatchJob.status.in_(['completed', 'failed'])
-    ).order_by(BatchJob.completed_at.desc()).all()
+    # One pass over the rows, keeping the created_at order within each group
+    active_batches, completed_batches = [], []
+    for b in all_batches:
+        (active_batches if b.status in ACTIVE_BATCH_STATUSES else completed_batches).append(b)
+    # Finished batches are listed most recently completed first
+    completed_batches.sort(key=lambda b: b.completed_at or datetime.min, reverse=True)
     
     return render_template('batches.html', 
                           active_batches=active_batches,
@@ -721,8 +1199,6 @@ def new_batch():
 @app.route('/create-batch', methods=['POST'])
 def create_batch():
     """Create a new batch job"""
-    from models import BatchJob, BatchJobItem
-    
     # Get form data
     name = request.form.get('name', '')
     description = request.form.get('description', '')
@@ -752,8 +1228,8 @@ def create_batch():
         flash('Please enter a name for the batch job', 'error')
         return redirect(url_for('new_batch'))
     
-    # Process URLs (split by newline and remove empty lines)
-    url_list = [url.strip() for url in urls_text.split('\n') if url.strip()]
+    # Process URLs (split by line and remove empty lines)
+    url_list = list(filter(None, (line.strip() for line in urls_text.splitlines())))
     
     if not url_list:
         flash('Please enter at least one URL', 'error')
@@ -765,7 +1241,11 @@ def create_batch():
     
     if validate_urls:
         for url in url_list:
-            # Basic URL validation
+            # Basic URL validation: plain http(s) URLs pass the regex, anything
+            # else falls back to a full urlparse
+            if _HTTP_URL_RE.match(url):
+                valid_urls.append(url)
+                continue
             try:
                 parsed = urlparse(url)
                 if not parsed.scheme or not parsed.netloc:
@@ -777,11 +1257,21 @@ def create_batch():
     else:
         valid_urls = url_list
     
+    # Drop repeated URLs, comparing canonical forms but keeping the first
+    # spelling that was submitted; URLs that don't parse at all are invalid
+    unique_urls, unparsable = dedupe_urls(valid_urls)
+    invalid_urls.extend(unparsable)
+    
     if invalid_urls:
         flash(f'Found {len(invalid_urls)} invalid URLs. Please check your input.', 'warning')
-        if not valid_urls:
+        if not unique_urls:
             return redirect(url_for('new_batch'))
     
+    duplicates = len(valid_urls) - len(unparsable) - len(unique_urls)
+    if duplicates:
+        flash(f'Skipped {duplicates} duplicate URLs', 'info')
+    valid_urls = list(unique_urls.values())
+    
     # Create output directory
     output_path = Path(output_dir)
     ensure_directory(output_path)
@@ -815,16 +1305,8 @@ def create_batch():
     db.session.add(batch)
     db.session.commit()
     
-    # Add each URL as a batch item
-    for url in valid_urls:
-        item = BatchJobItem(
-            batch_job_id=batch.id,
-            url=url,
-            status='pending',
-            created_at=datetime.utcnow()
-        )
-        db.session.add(item)
-    
+    # Add the URLs as batch items
+    BatchJobItem.bulk_create(db.session, batch.id, valid_urls, chunk_size=BATCH_ITEM_INSERT_CHUNK)
     db.session.commit()
     
     # Flash success message
@@ -838,36 +1320,51 @@ def create_batch():
 
 @app.route('/batch/<int:batch_id>')
 def batch_detail(batch_id):
-    """View details of a specific batch job"""
-    from models import BatchJob, BatchJobItem
-    
+    """View details of a specific batch job, one page of one status tab at a time"""
     # Get the batch job
     batch = BatchJob.query.get_or_404(batch_id)
     
-    # Get all items
-    batch_items = BatchJobItem.query.filter_by(batch_job_id=batch_id).all()
-    
-    # Filter items by status for tabs
-    pending_items = [item for item in batch_items if item.status == 'pending']
-    processing_items = [item for item in batch_items if item.status == 'processing']
-    completed_items = [item for item in batch_items if item.status == 'completed']
-    failed_items = [item for item in batch_items if item.status == 'failed']
+    # Tab badges come from a single grouped count rather than loading every item
+    counts = dict(
+        db.session.query(BatchJobItem.status, func.count())
+        .filter(BatchJobItem.batch_job_id == batch_id)
+        .group_by(BatchJobItem.status)
+        .all()
+    )
+    counts['all'] = sum(counts.values())
+    
+    tab = request.args.get('tab', 'all')
+    if tab not in BATCH_ITEM_TABS:
+        tab = 'all'
+    
+    items_query = BatchJobItem.query.filter_by(batch_job_id=batch_id)
+    if tab != 'all':
+        items_query = items_query.filter_by(status=tab)
+    
+    # Only hydrate the columns batch_items_table.html renders
+    items_query = items_query.options(load_only(
+        BatchJobItem.id, BatchJobItem.url, BatchJobItem.status, BatchJobItem.result_id,
+        BatchJobItem.error_message, BatchJobItem.error_code, BatchJobItem.error_detail,
+        BatchJobItem.started_at, BatchJobItem.completed_at
+    ))
+    
+    page = request.args.get('page', 1, type=int)
+    pagination = items_query.order_by(BatchJobItem.id).paginate(
+        page=page, per_page=BATCH_ITEMS_PER_PAGE, error_out=False
+    )
     
     return render_template(
         'batch_detail.html',
         batch=batch,
-        batch_items=batch_items,
-        pending_items=pending_items,
-        processing_items=processing_items,
-        completed_items=completed_items,
-        failed_items=failed_items
+        counts=counts,
+        tab=tab,
+        items=pagination.items,
+        pagination=pagination
     )
 
 @app.route('/start-batch/<int:batch_id>')
 def start_batch(batch_id):
     """Start processing a batch job"""
-    from models import BatchJob
-    
     # Get the batch job
     batch = BatchJob.query.get_or_404(batch_id)
     
@@ -885,8 +1382,9 @@ def start_batch(batch_id):
     flash('Batch job started. Processing URLs in background.', 'success')
     
     # Start processing in a background thread
-    import threading
-    thread = threading.Thread(target=process_batch_job, args=(batch_id,))
+    _batch_stop_events[batch_id] = threading.Event()
+    progress = _start_batch_progress(batch)
+    thread = threading.Thread(target=process_batch_job, args=(batch_id, progress))
     thread.daemon = True
     thread.start()
     
@@ -895,8 +1393,6 @@ def start_batch(batch_id):
 @app.route('/pause-batch/<int:batch_id>')
 def pause_batch(batch_id):
     """Pause a running batch job"""
-    from models import BatchJob
-    
     # Get the batch job
     batch = BatchJob.query.get_or_404(batch_id)
     
@@ -905,9 +1401,10 @@ def pause_batch(batch_id):
         flash(f'Cannot pause batch job in {batch.status} status', 'error')
         return redirect(url_for('batch_detail', batch_id=batch_id))
     
-    # Update the status
+    # Update the status, then tell the worker to stop starting new items
     batch.status = 'paused'
     db.session.commit()
+    _signal_batch_stop(batch_id)
     
     flash('Batch job paused. Currently processing URLs will complete before pausing.', 'info')
     return redirect(url_for('batch_detail', batch_id=batch_id))
@@ -915,8 +1412,6 @@ def pause_batch(batch_id):
 @app.route('/delete-batch/<int:batch_id>')
 def delete_batch(batch_id):
     """Delete a batch job and its items"""
-    from models import BatchJob, BatchJobItem
-    
     # Get the batch job
     batch = BatchJob.query.get_or_404(batch_id)
     
@@ -925,7 +1420,10 @@ def delete_batch(batch_id):
         flash('Cannot delete a running batch job. Please pause it first.', 'error')
         return redirect(url_for('batch_detail', batch_id=batch_id))
     
-    # Delete the batch job (cascade will delete items)
+    _signal_batch_stop(batch_id, forget=True)
+    
+    # Delete the items in one statement rather than one DELETE per item via the cascade
+    db.session.execute(delete(BatchJobItem).where(BatchJobItem.batch_job_id == batch_id))
     db.session.delete(batch)
     db.session.commit()
     
@@ -935,8 +1433,6 @@ def delete_batch(batch_id):
 @app.route('/retry-item/<int:item_id>')
 def retry_item(item_id):
     """Retry a failed batch job item"""
-    from models import BatchJobItem
-    
     # Get the item
     item = BatchJobItem.query.get_or_404(item_id)
     
@@ -948,16 +1444,16 @@ def retry_item(item_id):
     # Reset the item
     item.status = 'pending'
     item.error_message = None
+    item.error_code = None
+    item.error_detail = None
     item.started_at = None
     item.completed_at = None
-    db.session.commit()
     
-    # Update batch statistics
-    batch = item.batch_job
-    batch.failed_urls -= 1
-    batch.processed_urls -= 1
+    # Update batch statistics in the same transaction
+    add_batch_counts(item.batch_job_id, 0, -1)
     
     # If the batch is completed or failed, set it back to pending
+    batch = item.batch_job
     if batch.status in ['completed', 'failed']:
         batch.status = 'pending'
     
@@ -969,28 +1465,26 @@ def retry_item(item_id):
 @app.route('/retry-failed-urls/<int:batch_id>')
 def retry_failed_urls(batch_id):
     """Retry all failed URLs in a batch job"""
-    from models import BatchJob, BatchJobItem
-    
     # Get the batch job
     batch = BatchJob.query.get_or_404(batch_id)
     
-    # Get all failed items
-    failed_items = BatchJobItem.query.filter_by(batch_job_id=batch_id, status='failed').all()
+    # Reset all failed items with a single UPDATE
+    reset_count = db.session.execute(
+        update(BatchJobItem)
+        .where(BatchJobItem.batch_job_id == batch_id, BatchJobItem.status == 'failed')
+        .values(
+            status='pending', error_message=None, error_code=None, error_detail=None,
+            started_at=None, completed_at=None
+        )
+    ).rowcount
     
-    if not failed_items:
+    if not reset_count:
+        db.session.rollback()
         flash('No failed items to retry', 'info')
         return redirect(url_for('batch_detail', batch_id=batch_id))
     
-    # Reset failed items
-    for item in failed_items:
-        item.status = 'pending'
-        item.error_message = None
-        item.started_at = None
-        item.completed_at = None
-    
     # Update batch statistics and status
-    batch.failed_urls = 0
-    batch.processed_urls -= len(failed_items)
+    add_batch_counts(batch_id, 0, -reset_count)
     
     # If the batch is completed or failed, set it back to pending
     if batch.status in ['completed', 'failed']:
@@ -998,40 +1492,64 @@ def retry_failed_urls(batch_id):
     
     db.session.commit()
     
-    flash(f'Reset {len(failed_items)} failed items for retry', 'success')
+    flash(f'Reset {reset_count} failed items for retry', 'success')
     return redirect(url_for('batch_detail', batch_id=batch_id))
 
 @app.route('/export-batch-results/<int:batch_id>')
 def export_batch_results(batch_id):
     """Export all results from a batch job"""
-    from models import BatchJob, BatchJobItem, CrawlResult
-    
     # Get the batch job
     batch = BatchJob.query.get_or_404(batch_id)
     
     # Check if it has completed items
-    completed_items = BatchJobItem.query.filter_by(batch_job_id=batch_id, status='completed').all()
-    
-    if not completed_items:
+    completed = (BatchJobItem.batch_job_id == batch_id, BatchJobItem.status == 'completed')
+    if db.session.execute(select(BatchJobItem.id).where(*completed).limit(1)).first() is None:
         flash('No completed items to export', 'warning')
         return redirect(url_for('batch_detail', batch_id=batch_id))
     
-    # For now, redirect to the batch detail page
-    # In a real implementation, you would generate a zip file of all results
-    flash('Export functionality will be implemented in a future update', 'info')
-    return redirect(url_for('batch_detail', batch_id=batch_id))
+    columns = (
+        BatchJobItem.url, CrawlResult.title, CrawlResult.output_file, CrawlResult.word_count,
+        CrawlResult.link_count, CrawlResult.image_count, BatchJobItem.completed_at,
+    )
+    
+    def generate():
+        # Rows come off a server-side cursor a chunk at a time and are written out as
+        # they arrive, so memory stays flat however many items the batch holds
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([column.key for column in columns])
+        rows = db.session.execute(
+            select(*columns)
+            .outerjoin(CrawlResult, CrawlResult.id == BatchJobItem.result_id)
+            .where(*completed)
+            .order_by(BatchJobItem.id)
+            .execution_options(yield_per=BATCH_EXPORT_CHUNK, stream_results=True)
+        )
+        for chunk in rows.partitions():
+            writer.writerows(chunk)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="batch_{batch.id}_results.csv"'},
+    )
 
-def process_batch_job(batch_id):
+def process_batch_job(batch_id, progress=None):
     """
     Process a batch job in the background.
     
     This function is called in a separate thread to process URLs in a batch job.
-    It selects pending items, crawls them, and updates the database with results.
+    It drives an asyncio event loop that crawls pending items concurrently and
+    updates the database with results. `progress` is this run's entry in
+    _batch_progress, updated as items finish.
     """
-    from models import BatchJob, BatchJobItem, CrawlResult
-    
     # Create a new app context for this thread
     with app.app_context():
+        batch = None
+        stop_event = None
         try:
             # Get the batch job
             batch = BatchJob.query.get(batch_id)
@@ -1046,18 +1564,17 @@ def process_batch_job(batch_id):
             
             logger.info(f"Starting batch job {batch_id} processing")
             
-            # Import crawl4ai here to avoid startup errors if not installed
-            try:
-                import crawl4ai
-            except ImportError:
+            # crawl4ai is imported once at module load; None means it is not installed
+            if crawl4ai is None:
                 logger.error("crawl4ai library is not installed")
                 batch.status = 'failed'
                 batch.error_message = 'crawl4ai library is not installed'
                 db.session.commit()
                 return
             
-            # Set up crawler with batch options
-            crawler = crawl4ai.Crawler(
+            # Set up crawlers with batch options
+            make_crawler = functools.partial(
+                crawl4ai.Crawler,
                 use_browser=batch.use_browser,
                 include_images=batch.include_images,
                 include_links=batch.include_links,
@@ -1073,148 +1590,287 @@ def process_batch_job(batch_id):
                 break_duration=batch.break_duration
             )
             
-            # Process items in batches based on concurrent_workers
-            concurrent_limit = batch.concurrent_workers
+            # Results are written straight into the batch output directory
+            ensure_directory(batch.output_dir)
             
-            # Keep track of active workers and processed URLs
-            active_workers = 0
-            total_processed = 0
+            stop_event = _batch_stop_events.setdefault(batch_id, threading.Event())
+            asyncio.run(run_batch(batch, make_crawler, stop_event, progress))
             
-            # Continue until all items are processed or batch status is changed
-            while batch.status == 'running' and total_processed < batch.total_urls:
-                # Check if batch has been updated by another process
+            # Every item has been handled unless the batch was paused or deleted.
+            # A batch restarted after a pause has a new worker that finishes it.
+            if stop_event.is_set():
+                logger.info(f"Batch job {batch_id} was paused or deleted, stopping")
+            else:
                 db.session.refresh(batch)
-                
-                # If batch status has changed, stop processing
-                if batch.status != 'running':
-                    logger.info(f"Batch job {batch_id} status changed to {batch.status}, stopping")
-                    break
-                
-                # Find pending items to process
-                pending_items = BatchJobItem.query.filter_by(
-                    batch_job_id=batch_id, 
-                    status='pending'
-                ).limit(concurrent_limit - active_workers).all()
-                
-                if not pending_items:
-                    # No more pending items, check if there are any processing items
-                    processing_items = BatchJobItem.query.filter_by(
-                        batch_job_id=batch_id, 
-                        status='processing'
-                    ).count()
-                    
-                    if processing_items == 0:
-                        # No more items to process, mark batch as completed
-                        batch.status = 'completed'
-                        batch.completed_at = datetime.utcnow()
-                        db.session.commit()
-                        logger.info(f"Batch job {batch_id} completed")
-                        break
-                    
-                    # Wait for processing items to complete
-                    logger.info(f"Waiting for {processing_items} items to complete")
-                    import time
-                    time.sleep(5)
-                    continue
-                
-                # Process each pending item
-                for item in pending_items:
-                    # Update item status
-                    item.status = 'processing'
-                    item.started_at = datetime.utcnow()
-                    db.session.commit()
-                    
-                    try:
-                        logger.info(f"Processing item {item.id}: {item.url}")
-                        
-                        # Crawl URL
-                        result = crawler.crawl_url(item.url)
-                        
-                        # Generate filename from URL
-                        parsed_url = urlparse(item.url)
-                        domain = parsed_url.netloc.replace('.', '_')
-                        filename = f"{domain}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-                        
-                        # Save result
-                        output_file = save_result(result, batch.output_dir, batch.format, filename)
-                        
-                        # Create result in database
-                        db_result = CrawlResult(
-                            job_id=batch_id,  # Use batch_id as job_id for now
-                            url=item.url,
-                            title=result.get('title', ''),
-                            output_file=output_file,
-                            content_length=len(result.get('text', '')),
-                            word_count=len(result.get('text', '').split()),
-                            link_count=len(result.get('links', [])),
-                            image_count=len(result.get('images', [])),
-                            created_at=datetime.utcnow()
-                        )
-                        db.session.add(db_result)
-                        db.session.commit()
-                        
-                        # Update item status
-                        item.status = 'completed'
-                        item.result_id = db_result.id
-                        item.completed_at = datetime.utcnow()
-                        
-                        # Update batch statistics
-                        batch.processed_urls += 1
-                        batch.successful_urls += 1
-                        
-                        logger.info(f"Successfully processed {item.url}")
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing {item.url}: {str(e)}")
-                        
-                        # Format error message
-                        error_info = format_error_message(e, include_exception_details=True)
-                        
-                        # Update item status
-                        item.status = 'failed'
-                        item.error_message = json.dumps(error_info)
-                        item.completed_at = datetime.utcnow()
-                        
-                        # Update batch statistics
-                        batch.processed_urls += 1
-                        batch.failed_urls += 1
-                    
-                    # Commit changes
-                    db.session.commit()
-                    total_processed += 1
-                
-                # Check if we should continue
-                if batch.processed_urls >= batch.total_urls:
-                    # All items processed, mark batch as completed
+                if batch.status == 'running':
                     batch.status = 'completed'
                     batch.completed_at = datetime.utcnow()
                     db.session.commit()
                     logger.info(f"Batch job {batch_id} completed, processed {batch.processed_urls} URLs")
-                    break
-            
-            # Final check for completion
-            db.session.refresh(batch)
-            if batch.processed_urls >= batch.total_urls and batch.status == 'running':
-                batch.status = 'completed'
-                batch.completed_at = datetime.utcnow()
-                db.session.commit()
-                logger.info(f"Batch job {batch_id} completed, processed {batch.processed_urls} URLs")
                 
         except Exception as e:
             logger.error(f"Error processing batch job {batch_id}: {str(e)}")
             
             # Try to update batch status if possible
             try:
-                if batch:
+                db.session.rollback()
+                if batch and batch_exists(batch_id):
                     batch.status = 'failed'
                     batch.error_message = str(e)
                     db.session.commit()
             except Exception as inner_e:
                 logger.error(f"Error updating batch status: {str(inner_e)}")
+        finally:
+            _finish_batch_progress(batch_id, progress)
+            if stop_event is not None and _batch_stop_events.get(batch_id) is stop_event:
+                _batch_stop_events.pop(batch_id, None)
+
+async def run_batch(batch, make_crawler, stop_event, progress=None):
+    """
+    Crawl a batch's pending items, at most `concurrent_workers` at a time.
+    
+    Pending items are claimed `concurrent_workers` at a time so huge batches
+    never sit in memory at once. A new item starts as soon as any in-flight item
+    finishes, so one slow URL never holds the rest of the batch back. No new
+    item is started once `stop_event` is set by a pause or delete.
+    
+    Crawler delay and break state is per instance and not thread-safe, so each
+    in-flight item borrows a crawler of its own, created by `make_crawler` the
+    first time a slot needs one and reused afterwards.
+    """
+    limit = max(1, batch.concurrent_workers)
+    writes = {
+        'items': [],
+        'results': [],
+        'flush_every': max(1, min(batch.concurrent_workers, 32)),
+        'flushed_at': time.monotonic(),
+        'progress': progress
+    }
+    queued = deque()
+    in_flight = {}  # task -> the crawler it is using
+    idle_crawlers = []
+    
+    while not stop_event.is_set():
+        if not queued:
+            flush_batch_writes(batch, writes)
+            queued.extend(claim_batch_items(batch.id, limit))
+        
+        while queued and len(in_flight) < limit and not stop_event.is_set():
+            item_id, url = queued.popleft()
+            crawler = idle_crawlers.pop() if idle_crawlers else make_crawler()
+            task = asyncio.create_task(process_batch_item(batch, crawler, item_id, url, writes))
+            in_flight[task] = crawler
+        
+        if not in_flight:
+            break
+        
+        # Wake up as soon as any item finishes, or when buffered results are due
+        # to be written even though every item in flight is still crawling
+        done, _ = await asyncio.wait(in_flight, timeout=BATCH_FLUSH_INTERVAL,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            idle_crawlers.append(in_flight.pop(task))
+        if time.monotonic() - writes['flushed_at'] >= BATCH_FLUSH_INTERVAL:
+            flush_batch_writes(batch, writes)
+    
+    # Hand back items that were claimed but never started
+    if queued:
+        db.session.execute(
+            update(BatchJobItem)
+            .where(BatchJobItem.id.in_([item_id for item_id, _ in queued]))
+            .values(status='pending', started_at=None)
+        )
+        db.session.commit()
+    
+    # Let items that were already running finish before returning, still
+    # writing out the ones that finish on the usual schedule
+    while in_flight:
+        done, _ = await asyncio.wait(in_flight, timeout=BATCH_FLUSH_INTERVAL)
+        for task in done:
+            del in_flight[task]
+        if time.monotonic() - writes['flushed_at'] >= BATCH_FLUSH_INTERVAL:
+            flush_batch_writes(batch, writes)
+    flush_batch_writes(batch, writes)
+
+def claim_batch_items(batch_id, limit):
+    """
+    Atomically move up to `limit` pending items of a batch to processing.
+    
+    FOR UPDATE SKIP LOCKED lets several workers claim from the same batch
+    without handing out an item twice; SQLite has no row locks, so there
+    the clause is dropped and its database-wide write lock does the job.
+    Higher-priority items are claimed first, then in the order they were
+    added. Nothing is claimed once the batch is no longer running, which
+    stops workers in other processes that never see the stop event.
+    Returns (id, url) pairs for the claimed items.
+    """
+    batch_running = select(BatchJob.id).where(BatchJob.id == batch_id, BatchJob.status == 'running').exists()
+    claimed = db.session.execute(
+        select(BatchJobItem.id, BatchJobItem.url)
+        .where(BatchJobItem.batch_job_id == batch_id, BatchJobItem.status == 'pending', batch_running)
+        .order_by(BatchJobItem.priority.desc(), BatchJobItem.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+    
+    if claimed:
+        db.session.execute(
+            update(BatchJobItem)
+            .where(BatchJobItem.id.in_([item_id for item_id, _ in claimed]))
+            .values(status='processing', started_at=datetime.utcnow())
+        )
+    db.session.commit()
+    return [tuple(row) for row in claimed]
+
+async def process_batch_item(batch, crawler, item_id, url, writes):
+    """
+    Crawl one batch item and buffer the outcome in `writes`.
+    
+    Only the crawl itself leaves the event loop thread; all database work
+    stays on it, so the worker's session is never shared across threads.
+    Nothing is written until flush_batch_writes runs, so no transaction is
+    held open while URLs are being fetched.
+    """
+    started_at = datetime.utcnow()
+    
+    try:
+        logger.info(f"Processing item {item_id}: {url}")
+        
+        # Crawl URL
+        result = await asyncio.to_thread(crawler.crawl_url, url)
+        
+        # One timestamp for the filename, the result row and the item
+        now = datetime.utcnow()
+        
+        # Generate filename from URL; the item id keeps concurrent items on one host apart
+        filename = f"{url_to_slug(url)}_{now.strftime('%Y%m%d_%H%M%S')}_{item_id}"
+        
+        # Save result
+        output_file = save_result(result, batch.output_dir, batch.format, filename)
+        
+        # Batch results belong to no crawl job; the item links to them via result_id
+        row = build_result_row(None, result, output_file, created_at=now)
+        row['url'] = url
+        
+        item_update = {
+            'id': item_id,
+            'status': 'completed',
+            'started_at': started_at,
+            'completed_at': now
+        }
+        writes['results'].append((row, item_update))
+        
+        logger.info(f"Successfully processed {url}")
+        
+    except Exception as e:
+        logger.error(f"Error processing {url}: {str(e)}")
+        
+        item_update = {
+            'id': item_id,
+            'status': 'failed',
+            'error_code': type(e).__name__,
+            'error_detail': str(e)[:ERROR_DETAIL_MAX_LENGTH],
+            'started_at': started_at,
+            'completed_at': datetime.utcnow()
+        }
+    
+    writes['items'].append(item_update)
+    if item_update['status'] == 'completed':
+        _update_batch_progress(writes['progress'], succeeded=1)
+    else:
+        _update_batch_progress(writes['progress'], failed=1)
+    # Flush on size, or on age so slow crawls don't leave the batch page stale
+    if (len(writes['items']) >= writes['flush_every']
+            or time.monotonic() - writes['flushed_at'] >= BATCH_FLUSH_INTERVAL):
+        flush_batch_writes(batch, writes)
+
+def flush_batch_writes(batch, writes):
+    """
+    Write buffered item outcomes, their crawl results and the batch counters
+    in a single commit.
+    
+    If the write fails the buffered items are marked failed instead, so they
+    are not left pending and crawled again. If the batch has been deleted
+    while its items were in flight their rows are gone, and the outcomes are
+    dropped.
+    """
+    items, results = writes['items'], writes['results']
+    writes['flushed_at'] = time.monotonic()
+    if not items:
+        return
+    writes['items'], writes['results'] = [], []
+    batch_id = batch.id
+    
+    if not batch_exists(batch_id):
+        logger.info(f"Batch {batch_id} was deleted, discarding {len(items)} finished items")
+        return
+    
+    try:
+        if results:
+            # return_defaults fills in each row's primary key for result_id
+            rows = [row for row, _ in results]
+            db.session.bulk_insert_mappings(CrawlResult, rows, return_defaults=True)
+            for row, item_update in results:
+                item_update['result_id'] = row['id']
+        
+        db.session.bulk_update_mappings(BatchJobItem, items)
+        
+        add_batch_counts(batch_id, len(results), len(items) - len(results))
+        db.session.commit()
+        
+    except Exception as e:
+        db.session.rollback()
+        if not batch_exists(batch_id):
+            # Deleted between the check above and the write
+            logger.info(f"Batch {batch_id} was deleted, discarding {len(items)} finished items")
+            return
+        logger.error(f"Error saving results for batch {batch_id}: {str(e)}")
+        
+        error_code = type(e).__name__
+        error_detail = str(e)[:ERROR_DETAIL_MAX_LENGTH]
+        completed_at = datetime.utcnow()
+        db.session.bulk_update_mappings(BatchJobItem, [
+            {
+                'id': item['id'],
+                'status': 'failed',
+                'error_code': error_code,
+                'error_detail': error_detail,
+                'completed_at': completed_at
+            }
+            for item in items
+        ])
+        add_batch_counts(batch_id, 0, len(items))
+        db.session.commit()
+        _update_batch_progress(writes['progress'], succeeded=-len(results), failed=len(results))
+
+def batch_exists(batch_id):
+    """Whether a batch's row is still in the database"""
+    return db.session.execute(select(BatchJob.id).where(BatchJob.id == batch_id)).first() is not None
+
+def add_batch_counts(batch_id, succeeded, failed):
+    """
+    Add to a batch's statistics with one UPDATE evaluated in the database.
+    
+    Incrementing in SQL rather than on the loaded BatchJob avoids a
+    read-modify-write race with anything else touching the same counters.
+    Negative counts take items back out, e.g. when failed items are retried.
+    The caller commits, together with the item changes being counted.
+    """
+    db.session.execute(
+        update(BatchJob)
+        .where(BatchJob.id == batch_id)
+        .values(
+            processed_urls=BatchJob.processed_urls + succeeded + failed,
+            successful_urls=BatchJob.successful_urls + succeeded,
+            failed_urls=BatchJob.failed_urls + failed
+        )
+    )
 
 # Initialize settings when the app starts
 with app.app_context():
     init_default_settings()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # The dev server is for local use only; deploy with gunicorn via wsgi.py
+    debug = os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true', 'yes')
+    app.run(host='0.0.0.0', port=5000, debug=debug, use_reloader=debug)
\ No newline at end of file
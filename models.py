@@ -1,259 +1,272 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, JSON, ForeignKey
-from sqlalchemy.orm import relationship
+from itertools import islice
+from typing import Any, List, Optional
+from sqlalchemy import Integer, SmallInteger, String, DateTime, Text, Boolean, JSON, Enum, ForeignKey, Index, case, insert, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.hybrid import hybrid_method
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app import db
 
-class CrawlJob(db.Model):
+# Binary jsonb on PostgreSQL, so reads aren't re-parsed; plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), 'postgresql')
+
+# Bound once for to_dict, which calls it for every datetime of every row
+_isofmt = datetime.isoformat
+
+
+class SerializableMixin:
+    """
+    Shared to_dict for the models.
+    
+    Which columns hold datetimes is worked out once per class when it is
+    mapped, so serializing a row is a single pass over the precomputed
+    (key, is_datetime) pairs.
+    """
+    _SERDE_COLS = ()
+    
+    def __init_subclass__(cls, **kwargs):
+        # Map the class first so __table__ exists
+        super().__init_subclass__(**kwargs)
+        table = getattr(cls, '__table__', None)
+        if table is not None:
+            cls._SERDE_COLS = tuple(
+                (column.key, isinstance(column.type, DateTime)) for column in table.columns
+            )
+    
+    def to_dict(self):
+        """
+        Convert model to dictionary, with datetimes as ISO strings.
+        
+        Values are read straight from the instance's loaded state; only when a
+        column has been expired (e.g. after a commit) does it go through the
+        attribute, which reloads the row once.
+        """
+        state = self.__dict__
+        data = {}
+        for key, is_datetime in self._SERDE_COLS:
+            value = state[key] if key in state else getattr(self, key)
+            data[key] = _isofmt(value) if is_datetime and value is not None else value
+        return data
+
+class CrawlJob(SerializableMixin, db.Model):
     """Model for tracking crawl jobs"""
     __tablename__ = 'crawl_jobs'
     
-    id = Column(Integer, primary_key=True)
-    crawl_type = Column(String(50), nullable=False)  # single, multiple, deep, files
-    url = Column(String(2048), nullable=True)         # Main URL for single, deep, files
-    urls = Column(JSON, nullable=True)                # List of URLs for multiple crawl
-    output_dir = Column(String(255), nullable=False)
-    format = Column(String(20), nullable=True)
-    use_browser = Column(Boolean, default=False)
-    include_images = Column(Boolean, default=True)
-    include_links = Column(Boolean, default=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    crawl_type: Mapped[str] = mapped_column(String(50), nullable=False)  # single, multiple, deep, files
+    url: Mapped[Optional[str]] = mapped_column(String(2048), nullable=True)         # Main URL for single, deep, files
+    urls: Mapped[Optional[Any]] = mapped_column(JSONType, nullable=True)            # List of URLs for multiple crawl
+    output_dir: Mapped[str] = mapped_column(String(255), nullable=False)
+    format: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
+    use_browser: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    include_images: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    include_links: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
     
     # For deep crawl
-    max_depth = Column(Integer, nullable=True)
-    max_pages = Column(Integer, nullable=True)
-    stay_within_domain = Column(Boolean, default=True)
+    max_depth: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
+    max_pages: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    stay_within_domain: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
     
     # For file downloads
-    file_types = Column(String(255), nullable=True)
-    max_size = Column(Integer, nullable=True)
-    max_files = Column(Integer, nullable=True)
+    file_types: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    max_size: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    max_files: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     
     # Crawl speed limiting options
-    use_random_delay = Column(Boolean, default=False)
-    random_delay_min = Column(Integer, default=1)     # Minimum delay in seconds
-    random_delay_max = Column(Integer, default=5)     # Maximum delay in seconds
-    use_adaptive_delay = Column(Boolean, default=False)
-    adaptive_delay_factor = Column(Integer, default=2) # Multiply response time by this factor
-    use_scheduled_breaks = Column(Boolean, default=False)
-    requests_before_break = Column(Integer, default=50) # Number of requests before taking a break
-    break_duration = Column(Integer, default=30)       # Break duration in seconds
+    use_random_delay: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    random_delay_min: Mapped[Optional[int]] = mapped_column(Integer, default=1)     # Minimum delay in seconds
+    random_delay_max: Mapped[Optional[int]] = mapped_column(Integer, default=5)     # Maximum delay in seconds
+    use_adaptive_delay: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    adaptive_delay_factor: Mapped[Optional[int]] = mapped_column(Integer, default=2) # Multiply response time by this factor
+    use_scheduled_breaks: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    requests_before_break: Mapped[Optional[int]] = mapped_column(Integer, default=50) # Number of requests before taking a break
+    break_duration: Mapped[Optional[int]] = mapped_column(Integer, default=30)       # Break duration in seconds
     
     # Metadata
-    status = Column(String(20), default='pending')  # pending, running, completed, failed
-    created_at = Column(DateTime, default=datetime.utcnow)
-    completed_at = Column(DateTime, nullable=True)
-    error_message = Column(Text, nullable=True)
-    pages_crawled = Column(Integer, default=0)
-    files_downloaded = Column(Integer, default=0)
+    status: Mapped[Optional[str]] = mapped_column(
+        Enum('pending', 'running', 'completed', 'failed',
+             name='crawl_job_status', native_enum=False, create_constraint=True, length=20),
+        default='pending'
+    )
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    error_message: Mapped[Optional[Any]] = mapped_column(JSONType, nullable=True)  # error_info dict from error_handler, or a plain message
+    pages_crawled: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    files_downloaded: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    
+    # Relationships; query results explicitly rather than lazy-loading them
+    results: Mapped[List["CrawlResult"]] = relationship(back_populates="job", passive_deletes=True, lazy='raise')
     
     def __repr__(self):
         return f"<CrawlJob {self.id} - {self.crawl_type} - {self.status}>"
     
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            'id': self.id,
-            'crawl_type': self.crawl_type,
-            'url': self.url,
-            'urls': self.urls,
-            'output_dir': self.output_dir,
-            'format': self.format,
-            'use_browser': self.use_browser,
-            'include_images': self.include_images,
-            'include_links': self.include_links,
-            'max_depth': self.max_depth,
-            'max_pages': self.max_pages,
-            'stay_within_domain': self.stay_within_domain,
-            'file_types': self.file_types,
-            'max_size': self.max_size,
-            'max_files': self.max_files,
-            'use_random_delay': self.use_random_delay,
-            'random_delay_min': self.random_delay_min,
-            'random_delay_max': self.random_delay_max,
-            'use_adaptive_delay': self.use_adaptive_delay,
-            'adaptive_delay_factor': self.adaptive_delay_factor,
-            'use_scheduled_breaks': self.use_scheduled_breaks,
-            'requests_before_break': self.requests_before_break,
-            'break_duration': self.break_duration,
-            'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'error_message': self.error_message,
-            'pages_crawled': self.pages_crawled,
-            'files_downloaded': self.files_downloaded
-        }
-
 
-class CrawlResult(db.Model):
+class CrawlResult(SerializableMixin, db.Model):
     """Model for storing crawl results"""
     __tablename__ = 'crawl_results'
+    __table_args__ = (
+        Index('ix_crawlresult_job_id', 'job_id'),  # job_detail looks results up by job
+    )
     
-    id = Column(Integer, primary_key=True)
-    job_id = Column(Integer, nullable=False)
-    url = Column(String(2048), nullable=False)
-    title = Column(String(512), nullable=True)
-    output_file = Column(String(512), nullable=False)
-    content_length = Column(Integer, nullable=True)
-    word_count = Column(Integer, nullable=True)
-    link_count = Column(Integer, nullable=True)
-    image_count = Column(Integer, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # NULL for batch results, which are reached through BatchJobItem.result_id
+    job_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('crawl_jobs.id', ondelete='CASCADE'), nullable=True)
+    url: Mapped[str] = mapped_column(String(2048), nullable=False)
+    title: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    output_file: Mapped[str] = mapped_column(String(512), nullable=False)
+    content_length: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    word_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    link_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    image_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    job: Mapped[Optional["CrawlJob"]] = relationship(back_populates="results")
     
     def __repr__(self):
         return f"<CrawlResult {self.id} - {self.url}>"
     
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            'id': self.id,
-            'job_id': self.job_id,
-            'url': self.url,
-            'title': self.title,
-            'output_file': self.output_file,
-            'content_length': self.content_length,
-            'word_count': self.word_count,
-            'link_count': self.link_count,
-            'image_count': self.image_count,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
 
-
-class BatchJob(db.Model):
+class BatchJob(SerializableMixin, db.Model):
     """Model for batch processing of multiple URLs"""
     __tablename__ = 'batch_jobs'
+    __table_args__ = (
+        Index('ix_batchjob_status_created', 'status', 'created_at'),  # batch list by status, newest first
+    )
     
-    id = Column(Integer, primary_key=True)
-    name = Column(String(255), nullable=False)
-    description = Column(Text, nullable=True)
-    output_dir = Column(String(255), nullable=False)
-    format = Column(String(20), default='markdown')
-    use_browser = Column(Boolean, default=False)
-    include_images = Column(Boolean, default=True)
-    include_links = Column(Boolean, default=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    output_dir: Mapped[str] = mapped_column(String(255), nullable=False)
+    format: Mapped[Optional[str]] = mapped_column(String(20), default='markdown')
+    use_browser: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    include_images: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    include_links: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
     
     # Processing options
-    concurrent_workers = Column(Integer, default=3)  # How many URLs to process concurrently
-    timeout_per_url = Column(Integer, default=60)    # Timeout in seconds per URL
+    concurrent_workers: Mapped[Optional[int]] = mapped_column(SmallInteger, default=3)  # How many URLs to process concurrently
+    timeout_per_url: Mapped[Optional[int]] = mapped_column(Integer, default=60)    # Timeout in seconds per URL
     
     # Crawl speed limiting options
-    use_random_delay = Column(Boolean, default=False)
-    random_delay_min = Column(Integer, default=1)     # Minimum delay in seconds
-    random_delay_max = Column(Integer, default=5)     # Maximum delay in seconds
-    use_adaptive_delay = Column(Boolean, default=False)
-    adaptive_delay_factor = Column(Integer, default=2) # Multiply response time by this factor
-    use_scheduled_breaks = Column(Boolean, default=False)
-    requests_before_break = Column(Integer, default=50) # Number of requests before taking a break
-    break_duration = Column(Integer, default=30)       # Break duration in seconds
+    use_random_delay: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    random_delay_min: Mapped[Optional[int]] = mapped_column(Integer, default=1)     # Minimum delay in seconds
+    random_delay_max: Mapped[Optional[int]] = mapped_column(Integer, default=5)     # Maximum delay in seconds
+    use_adaptive_delay: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    adaptive_delay_factor: Mapped[Optional[int]] = mapped_column(Integer, default=2) # Multiply response time by this factor
+    use_scheduled_breaks: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    requests_before_break: Mapped[Optional[int]] = mapped_column(Integer, default=50) # Number of requests before taking a break
+    break_duration: Mapped[Optional[int]] = mapped_column(Integer, default=30)       # Break duration in seconds
     
     # Metadata
-    status = Column(String(20), default='pending')  # pending, running, completed, failed, paused
-    created_at = Column(DateTime, default=datetime.utcnow)
-    started_at = Column(DateTime, nullable=True)
-    completed_at = Column(DateTime, nullable=True)
+    status: Mapped[Optional[str]] = mapped_column(
+        Enum('pending', 'running', 'completed', 'failed', 'paused',
+             name='batch_job_status', native_enum=False, create_constraint=True, length=20),
+        default='pending'
+    )
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
     # Statistics
-    total_urls = Column(Integer, default=0)
-    processed_urls = Column(Integer, default=0)
-    successful_urls = Column(Integer, default=0)
-    failed_urls = Column(Integer, default=0)
+    total_urls: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    processed_urls: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    successful_urls: Mapped[Optional[int]] = mapped_column(Integer, default=0)
+    failed_urls: Mapped[Optional[int]] = mapped_column(Integer, default=0)
     
     # Relationships
-    items = relationship("BatchJobItem", back_populates="batch_job", cascade="all, delete-orphan")
+    # Items can number in the hundreds of thousands; query them explicitly rather than lazy-loading
+    items: Mapped[List["BatchJobItem"]] = relationship(
+        back_populates="batch_job", cascade="all, delete-orphan",
+        lazy='raise', passive_deletes=True
+    )
     
     def __repr__(self):
         return f"<BatchJob {self.id} - {self.name} - {self.status}>"
     
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'output_dir': self.output_dir,
-            'format': self.format,
-            'use_browser': self.use_browser,
-            'include_images': self.include_images,
-            'include_links': self.include_links,
-            'concurrent_workers': self.concurrent_workers,
-            'timeout_per_url': self.timeout_per_url,
-            'use_random_delay': self.use_random_delay,
-            'random_delay_min': self.random_delay_min,
-            'random_delay_max': self.random_delay_max,
-            'use_adaptive_delay': self.use_adaptive_delay,
-            'adaptive_delay_factor': self.adaptive_delay_factor,
-            'use_scheduled_breaks': self.use_scheduled_breaks,
-            'requests_before_break': self.requests_before_break,
-            'break_duration': self.break_duration,
-            'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'total_urls': self.total_urls,
-            'processed_urls': self.processed_urls,
-            'successful_urls': self.successful_urls,
-            'failed_urls': self.failed_urls
-        }
-    
+    @hybrid_method
     def progress_percentage(self):
         """Calculate the progress percentage of the batch job"""
         if self.total_urls <= 0:
             return 0
         return int((self.processed_urls / self.total_urls) * 100)
     
+    @progress_percentage.expression
+    def progress_percentage(cls):
+        """The same percentage as a SQL expression, for sorting and filtering in queries"""
+        return case((cls.total_urls > 0, cls.processed_urls * 100 // cls.total_urls), else_=0)
+    
+    @hybrid_method
     def remaining_urls(self):
         """Calculate the number of remaining URLs to process"""
         return self.total_urls - self.processed_urls
 
 
-class BatchJobItem(db.Model):
+class BatchJobItem(SerializableMixin, db.Model):
     """Model for individual URLs within a batch job"""
     __tablename__ = 'batch_job_items'
+    __table_args__ = (
+        # per-batch status lookups and counts
+        Index('ix_bji_batch_status_prio', 'batch_job_id', 'status', 'priority'),
+        # only the items a worker can still claim
+        Index('ix_bji_pending', 'batch_job_id', 'priority',
+              postgresql_where=text("status = 'pending'"), sqlite_where=text("status = 'pending'")),
+    )
     
-    id = Column(Integer, primary_key=True)
-    batch_job_id = Column(Integer, ForeignKey('batch_jobs.id'), nullable=False)
-    url = Column(String(2048), nullable=False)
-    priority = Column(Integer, default=0)  # Higher number = higher priority
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    batch_job_id: Mapped[int] = mapped_column(Integer, ForeignKey('batch_jobs.id', ondelete='CASCADE'), nullable=False)
+    url: Mapped[str] = mapped_column(String(2048), nullable=False)
+    priority: Mapped[Optional[int]] = mapped_column(SmallInteger, default=0)  # Higher number = higher priority
     
     # Processing status
-    status = Column(String(20), default='pending')  # pending, processing, completed, failed, skipped
-    result_id = Column(Integer, ForeignKey('crawl_results.id'), nullable=True)
-    error_message = Column(Text, nullable=True)
+    status: Mapped[Optional[str]] = mapped_column(
+        Enum('pending', 'processing', 'completed', 'failed', 'skipped',
+             name='batch_item_status', native_enum=False, create_constraint=True, length=20),
+        default='pending'
+    )
+    result_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey('crawl_results.id'), nullable=True)
+    error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)  # legacy JSON blob, kept for rows written before error_code
+    error_code: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)  # exception class name
+    error_detail: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    started_at = Column(DateTime, nullable=True)
-    completed_at = Column(DateTime, nullable=True)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
     # Relationships
-    batch_job = relationship("BatchJob", back_populates="items")
-    result = relationship("CrawlResult", foreign_keys=[result_id])
+    batch_job: Mapped["BatchJob"] = relationship(back_populates="items")
+    result: Mapped[Optional["CrawlResult"]] = relationship(foreign_keys=[result_id])
     
     def __repr__(self):
         return f"<BatchJobItem {self.id} - {self.url} - {self.status}>"
     
-    def to_dict(self):
-        """Convert model to dictionary"""
-        return {
-            'id': self.id,
-            'batch_job_id': self.batch_job_id,
-            'url': self.url,
-            'priority': self.priority,
-            'status': self.status,
-            'result_id': self.result_id,
-            'error_message': self.error_message,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'started_at': self.started_at.isoformat() if self.started_at else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None
-        }
-
+    @classmethod
+    def bulk_create(cls, session, batch_job_id, urls, chunk_size=10_000):
+        """
+        Insert pending items for `urls` with executemany INSERTs, bypassing the
+        unit of work. Rows are built `chunk_size` at a time so very large URL
+        lists never exist as rows all at once. The caller commits.
+        """
+        now = datetime.utcnow()
+        rows = (
+            {'batch_job_id': batch_job_id, 'url': url, 'priority': 0, 'status': 'pending', 'created_at': now}
+            for url in urls
+        )
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            session.execute(insert(cls), chunk)
+    
 
-class Setting(db.Model):
+class Setting(SerializableMixin, db.Model):
     """Model for application settings"""
     __tablename__ = 'settings'
     
-    id = Column(Integer, primary_key=True)
-    key = Column(String(100), nullable=False, unique=True)
-    value = Column(Text, nullable=True)
-    description = Column(String(512), nullable=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    key: Mapped[str] = mapped_column(String(100), nullable=False, unique=True)
+    value: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    description: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
     
     def __repr__(self):
-        return f"<Setting {self.key}>"
\ No newline at end of file
+        return f"<Setting {self.key}>"
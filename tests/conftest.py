@@ -0,0 +1,19 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# app.py reads DATABASE_URL at import time; keep the tests off any real database
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import main  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A test client whose results directory is a fresh temporary directory"""
+    monkeypatch.setattr(main, "RESULTS_DIR", tmp_path)
+    main.app.config["TESTING"] = True
+    return main.app.test_client()
@@ -0,0 +1,25 @@
+import main
+from app import db
+from models import BatchJob
+
+
+def test_progress_of_finished_batch_sends_final_counts_then_done(client):
+    """A batch that finished before the EventSource connected still closes the stream cleanly"""
+    with main.app.app_context():
+        batch = BatchJob(name="finished", output_dir="results", status="completed",
+                         total_urls=2, processed_urls=2, successful_urls=1, failed_urls=1)
+        db.session.add(batch)
+        db.session.commit()
+        batch_id = batch.id
+
+    response = client.get(f"/batch/{batch_id}/progress")
+
+    assert response.status_code == 200
+    assert response.get_data(as_text=True) == (
+        'data: {"processed": 2, "successful": 1, "failed": 1, "total": 2}\n\n'
+        "event: done\ndata: {}\n\n"
+    )
+
+
+def test_progress_of_missing_batch_is_404(client):
+    assert client.get("/batch/999999/progress").status_code == 404
@@ -0,0 +1,180 @@
+import asyncio
+import threading
+from datetime import datetime
+
+import pytest
+
+import main
+from app import db
+from models import BatchJob, BatchJobItem, CrawlResult
+
+
+@pytest.fixture
+def app_ctx():
+    with main.app.app_context():
+        yield
+        db.session.rollback()
+
+
+def make_batch(urls, priorities=None, **fields):
+    """Create a running batch with one pending item per URL; returns (batch, item ids)"""
+    fields.setdefault('output_dir', 'results')
+    batch = BatchJob(name="test", status="running", total_urls=len(urls),
+                     processed_urls=0, successful_urls=0, failed_urls=0, **fields)
+    db.session.add(batch)
+    db.session.commit()
+    BatchJobItem.bulk_create(db.session, batch.id, urls)
+    db.session.commit()
+    ids = [item_id for (item_id,) in db.session.execute(
+        db.select(BatchJobItem.id).where(BatchJobItem.batch_job_id == batch.id).order_by(BatchJobItem.id))]
+    for item_id, priority in zip(ids, priorities or ()):
+        db.session.get(BatchJobItem, item_id).priority = priority
+    db.session.commit()
+    return batch, ids
+
+
+def new_writes():
+    return {'items': [], 'results': [], 'flush_every': 1, 'flushed_at': 0, 'progress': None}
+
+
+def finished_item(item_id, status, **fields):
+    return {'id': item_id, 'status': status, 'started_at': datetime.utcnow(),
+            'completed_at': datetime.utcnow(), **fields}
+
+
+def result_row(url):
+    return main.build_result_row(None, {'url': url, 'title': 'Title', 'text': 'two words'}, 'out.md')
+
+
+class StubCrawler:
+    """Answers crawl_url from a url -> callable map; a callable may raise to fail the item"""
+
+    def __init__(self, handlers):
+        self.handlers = handlers
+
+    def crawl_url(self, url):
+        self.handlers.get(url, lambda: None)()
+        return {'url': url, 'title': url, 'markdown': '# page', 'text': 'page text'}
+
+
+def test_claim_takes_highest_priority_then_oldest(app_ctx):
+    batch, ids = make_batch([f"https://example.com/{i}" for i in range(4)], priorities=[0, 5, 5, 1])
+
+    claimed = main.claim_batch_items(batch.id, 3)
+
+    assert [item_id for item_id, _ in claimed] == [ids[1], ids[2], ids[3]]
+    statuses = dict(db.session.execute(
+        db.select(BatchJobItem.id, BatchJobItem.status).where(BatchJobItem.batch_job_id == batch.id)).all())
+    assert statuses == {ids[0]: 'pending', ids[1]: 'processing', ids[2]: 'processing', ids[3]: 'processing'}
+
+
+def test_claim_stops_once_batch_is_not_running(app_ctx):
+    batch, _ = make_batch(["https://example.com/a"])
+    batch.status = 'paused'
+    db.session.commit()
+
+    assert main.claim_batch_items(batch.id, 5) == []
+
+
+def test_pause_hands_claimed_but_unstarted_items_back(app_ctx, tmp_path):
+    urls = [f"https://example.com/{name}" for name in "abcd"]
+    batch, ids = make_batch(urls, concurrent_workers=2, output_dir=str(tmp_path), format='markdown')
+    stop_event = threading.Event()
+    release_b = threading.Event()
+
+    def pause_during_c():
+        # c starts once a has finished and c, d were claimed; d is left queued
+        stop_event.set()
+        release_b.set()
+
+    handlers = {urls[1]: lambda: release_b.wait(5), urls[2]: pause_during_c}
+    asyncio.run(main.run_batch(batch, lambda: StubCrawler(handlers), stop_event))
+
+    db.session.expire_all()
+    items = {item.id: item for item in BatchJobItem.query.filter_by(batch_job_id=batch.id)}
+    assert [items[item_id].status for item_id in ids] == ['completed', 'completed', 'completed', 'pending']
+    assert items[ids[3]].started_at is None
+    batch = db.session.get(BatchJob, batch.id)
+    assert (batch.processed_urls, batch.successful_urls, batch.failed_urls) == (3, 3, 0)
+    # Every completed item links to its own result file
+    files = {db.session.get(CrawlResult, items[item_id].result_id).output_file for item_id in ids[:3]}
+    assert len(files) == 3
+
+
+def test_flush_counts_mixed_outcomes(app_ctx):
+    batch, (ok_id, bad_id) = make_batch(["https://example.com/ok", "https://example.com/bad"])
+    writes = new_writes()
+    ok_update = finished_item(ok_id, 'completed')
+    writes['results'].append((result_row("https://example.com/ok"), ok_update))
+    writes['items'] += [ok_update, finished_item(bad_id, 'failed', error_code='TimeoutError', error_detail='slow')]
+
+    main.flush_batch_writes(batch, writes)
+
+    db.session.expire_all()
+    batch = db.session.get(BatchJob, batch.id)
+    assert (batch.processed_urls, batch.successful_urls, batch.failed_urls) == (2, 1, 1)
+    ok, bad = db.session.get(BatchJobItem, ok_id), db.session.get(BatchJobItem, bad_id)
+    assert ok.status == 'completed'
+    assert db.session.get(CrawlResult, ok.result_id).url == "https://example.com/ok"
+    assert (bad.status, bad.error_code, bad.result_id) == ('failed', 'TimeoutError', None)
+
+
+def test_flush_failure_marks_buffered_items_failed(app_ctx):
+    batch, (first_id, second_id) = make_batch(["https://example.com/1", "https://example.com/2"])
+    writes = new_writes()
+    for item_id in (first_id, second_id):
+        item_update = finished_item(item_id, 'completed')
+        row = result_row(f"https://example.com/{item_id}")
+        row['output_file'] = None  # NOT NULL, so the result insert fails
+        writes['results'].append((row, item_update))
+        writes['items'].append(item_update)
+
+    main.flush_batch_writes(batch, writes)
+
+    db.session.expire_all()
+    batch = db.session.get(BatchJob, batch.id)
+    assert (batch.processed_urls, batch.successful_urls, batch.failed_urls) == (2, 0, 2)
+    for item_id in (first_id, second_id):
+        item = db.session.get(BatchJobItem, item_id)
+        assert (item.status, item.error_code, item.result_id) == ('failed', 'IntegrityError', None)
+
+
+def test_add_batch_counts_can_take_items_back_out(app_ctx):
+    batch, _ = make_batch(["https://example.com/a"])
+    main.add_batch_counts(batch.id, 3, 2)
+    main.add_batch_counts(batch.id, 0, -1)
+    db.session.commit()
+
+    db.session.expire_all()
+    batch = db.session.get(BatchJob, batch.id)
+    assert (batch.processed_urls, batch.successful_urls, batch.failed_urls) == (4, 3, 1)
+
+
+def test_flush_after_batch_deleted_drops_outcomes(app_ctx):
+    """A worker still holding results for a batch deleted under it writes nothing and doesn't raise"""
+    batch, (item_id,) = make_batch(["https://example.com/a"])
+    writes = new_writes()
+    writes['items'].append(finished_item(item_id, 'failed', error_code='RuntimeError', error_detail='boom'))
+
+    db.session.execute(db.delete(BatchJobItem).where(BatchJobItem.batch_job_id == batch.id))
+    db.session.execute(db.delete(BatchJob).where(BatchJob.id == batch.id))
+    db.session.commit()
+
+    main.flush_batch_writes(batch, writes)
+
+    assert writes['items'] == []
+    assert db.session.get(BatchJobItem, item_id) is None
+
+
+def test_canonicalize_url():
+    assert main.canonicalize_url(" HTTP://Example.COM:80/a/?q=1#top ") == "http://example.com/a?q=1"
+    assert main.canonicalize_url("https://example.com:8443") == "https://example.com:8443/"
+
+
+def test_dedupe_urls_keeps_first_spelling_and_reports_unparsable():
+    unique, invalid = main.dedupe_urls(
+        ["https://Example.com/a/", "http://[oops", "https://example.com/a", "https://example.com/b"])
+
+    assert unique == {"https://example.com/a": "https://Example.com/a/",
+                      "https://example.com/b": "https://example.com/b"}
+    assert invalid == ["http://[oops"]
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+
+import main
+
+
+class FakeCrawler:
+    """Records whether two threads ever use the same instance at once"""
+
+    def __init__(self, overlaps):
+        self.lock = threading.Lock()
+        self.overlaps = overlaps
+
+    def crawl_url(self, url):
+        if not self.lock.acquire(blocking=False):
+            self.overlaps.append(url)
+            self.lock.acquire()
+        try:
+            threading.Event().wait(0.01)
+            if "fail" in url:
+                raise RuntimeError(f"cannot fetch {url}")
+            return {"url": url}
+        finally:
+            self.lock.release()
+
+
+def test_crawl_many_returns_failures_and_keeps_crawlers_apart():
+    overlaps, made = [], []
+
+    def make_crawler():
+        made.append(FakeCrawler(overlaps))
+        return made[-1]
+
+    urls = [f"https://example.com/{i}" for i in range(8)] + ["https://example.com/fail"]
+    results, failures = asyncio.run(main.crawl_many(make_crawler, urls, 3))
+
+    assert [r["url"] for r in results] == urls[:-1]
+    assert [url for url, _ in failures] == ["https://example.com/fail"]
+    assert len(made) == 3
+    assert overlaps == []
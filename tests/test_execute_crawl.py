@@ -0,0 +1,41 @@
+from concurrent.futures import Future
+from datetime import datetime
+
+import main
+from app import db
+from models import CrawlJob
+
+
+def test_crash_outside_execute_crawl_marks_job_failed():
+    with main.app.app_context():
+        job = CrawlJob(crawl_type="single", url="https://example.com", output_dir="results", status="running")
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+    future = Future()
+    future.set_exception(OSError("disk full"))
+    main._on_crawl_done(job_id, future)
+
+    with main.app.app_context():
+        job = db.session.get(CrawlJob, job_id)
+        assert job.status == "failed"
+        assert job.error_message["exception"] == {"type": "OSError", "message": "disk full"}
+        assert job.completed_at is not None
+
+
+def test_job_status_serializes_the_job(client):
+    with main.app.app_context():
+        job = CrawlJob(crawl_type="multiple", urls=["https://example.com"], output_dir="results",
+                       status="completed", pages_crawled=1, completed_at=datetime(2026, 1, 2, 3, 4, 5))
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+
+    data = client.get(f"/job/{job_id}/status").get_json()
+
+    assert data["id"] == job_id
+    assert data["status"] == "completed"
+    assert data["pages_crawled"] == 1
+    assert data["urls"] == ["https://example.com"]
+    assert data["completed_at"] == "2026-01-02T03:04:05"
@@ -0,0 +1,26 @@
+import main
+from models import BatchJob, BatchJobItem
+
+
+def test_create_batch_reports_unparsable_url(client, tmp_path):
+    """URLs urlsplit rejects are reported as invalid instead of failing the request"""
+    response = client.post("/create-batch", data={
+        "name": "unparsable",
+        "urls": "http://[oops\nhttps://example.com/\nhttps://EXAMPLE.com",
+        "output_dir": str(tmp_path / "batch"),
+        "validate_urls": "on",
+        "schedule_type": "later",
+    })
+
+    assert response.status_code == 302
+    with main.app.app_context():
+        batch = BatchJob.query.filter_by(name="unparsable").one()
+        urls = [item.url for item in BatchJobItem.query.filter_by(batch_job_id=batch.id)]
+    assert urls == ["https://example.com/"]
+
+
+def test_crawl_rejects_only_unparsable_urls(client):
+    response = client.post("/crawl", data={"crawl_type": "multiple", "urls": "http://[oops"})
+
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith("/")
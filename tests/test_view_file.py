@@ -0,0 +1,26 @@
+from urllib.parse import quote
+
+import main
+
+
+def test_view_ndjson_record(client, tmp_path):
+    """A <file>#<offset>:<length> locator renders just that record"""
+    with open(tmp_path / "job_1.ndjson", "wb") as f:
+        main.append_ndjson_result(f, {"url": "https://example.com/a", "title": "First"})
+        locator = main.append_ndjson_result(f, {"url": "https://example.com/b", "title": "Second"})
+    record = "job_1.ndjson#" + locator.rpartition("#")[2]
+
+    response = client.get("/view/" + quote(record))
+
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert "Second" in body
+    assert "First" not in body
+
+
+def test_view_ndjson_record_bad_locator(client, tmp_path):
+    (tmp_path / "job_1.ndjson").write_bytes(b'{"title": "First"}\n')
+
+    response = client.get("/view/" + quote("job_1.ndjson#oops"))
+
+    assert response.status_code == 404
@@ -0,0 +1,7 @@
+"""
+WSGI entry point for running Easy Crawl4AI under a production server, e.g.:
+
+    gunicorn -w $(nproc) -k gthread --threads 8 --timeout 300 wsgi:app
+"""
+
+from main import app  # noqa: F401